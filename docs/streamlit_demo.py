@@ -3,20 +3,30 @@ NextFitAI Resume Analyzer - Streamlit Demo
 A complete working Streamlit application for resume analysis using the NextFitAI API.
 
 To run this app:
-1. Install dependencies: pip install streamlit requests
+1. Install dependencies: pip install streamlit streamlit-autorefresh requests orjson
 2. Run the app: streamlit run streamlit_demo.py
 """
 
 import streamlit as st
-import requests
-import uuid
+from streamlit_autorefresh import st_autorefresh
+import orjson
 import time
-import json
+import hashlib
+import random
+import sys
+from collections import deque
 from datetime import datetime
+from pathlib import Path
 
 # API Configuration
 API_BASE_URL = "https://febwc3ocqb.execute-api.us-east-1.amazonaws.com/prod"
 
+# Identical resume + job description submissions reuse results for 1 hour
+ANALYSIS_CACHE_TTL = 3600
+
+# Presigned upload URLs are valid for 15 minutes; reuse them for 10
+UPLOAD_URL_TTL = 600
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="NextFitAI Resume Analyzer",
@@ -26,7 +36,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+_CSS = """
 <style>
     .main-header {
         text-align: center;
@@ -59,193 +69,232 @@ st.markdown("""
         border-left: 3px solid #28a745;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+def _inject_css():
+    """Emit the custom stylesheet"""
+    # Streamlit drops every element a rerun does not re-emit, so this has to
+    # run on each rerun rather than once per session
+    st.markdown(_CSS, unsafe_allow_html=True)
 
 # API Functions
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so all API calls reuse pooled keep-alive connections"""
+    # requests (and urllib3, certifi, ...) are imported lazily to speed up first paint
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    # Retries are handled by poll_for_results' backoff, not by urllib3
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=0)))
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
 def check_system_health():
-    """Check API system health with caching"""
+    """Check API system health, reusing the last response until invalidated
+    
+    The sidebar shows this status on every rerun; it is re-queried only after the
+    Check Health button or a failed API call invalidates it.
+    """
+    import requests
+    
+    if "_health" in st.session_state:
+        return st.session_state["_health"]
+    
     try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=10)
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        return {"status": "error", "message": str(e)}
+        response = get_http_session().get(f"{API_BASE_URL}/health", timeout=10)
+        health = orjson.loads(response.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        health = {"status": "error", "message": str(e)}
+    
+    st.session_state["_health"] = health
+    return health
+
+def invalidate_system_health():
+    """Drop the cached health response so the next check re-queries the API"""
+    st.session_state.pop("_health", None)
 
-def submit_analysis(resume_text, job_description):
-    """Submit resume analysis to API"""
-    analysis_id = str(uuid.uuid4())
+def get_upload_url(analysis_id, document):
+    """Get a presigned S3 upload (URL and form fields) for an input document, reusing it for up to 10 minutes"""
+    import requests
     
-    payload = {
-        "analysis_id": analysis_id,
-        "resume_text": resume_text,
-        "job_description": job_description
-    }
+    cached = st.session_state.upload_urls.get((analysis_id, document))
+    if cached and time.time() - cached["ts"] < UPLOAD_URL_TTL:
+        return cached
+    
+    response = get_http_session().get(
+        f"{API_BASE_URL}/upload-url",
+        params={"analysis_id": analysis_id, "document": document},
+        timeout=10
+    )
+    response.raise_for_status()
+    
+    try:
+        upload = orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        raise requests.exceptions.InvalidJSONError(f"Invalid /upload-url response: {e}") from e
+    upload["ts"] = time.time()
+    st.session_state.upload_urls[(analysis_id, document)] = upload
+    return upload
+
+def upload_input(analysis_id, document, text):
+    """Upload an input document straight to S3 and return its key"""
+    upload = get_upload_url(analysis_id, document)
+    # Presigned POST: the policy fields go first, the file last; S3 rejects
+    # uploads larger than the policy's content-length-range
+    response = get_http_session().post(
+        upload["url"],
+        data=upload["fields"],
+        files={"file": (f"{document}.txt", text.encode("utf-8"), "text/plain")},
+        timeout=30
+    )
+    response.raise_for_status()
+    return upload["key"]
+
+def submit_analysis(analysis_id, resume_text, job_description):
+    """Upload the inputs to S3 and submit resume analysis to API"""
+    import requests
     
     try:
-        response = requests.post(
+        # The texts go to S3 directly; only their keys pass through API Gateway
+        payload = {
+            "analysis_id": analysis_id,
+            "resume_key": upload_input(analysis_id, "resume", resume_text),
+            "jd_key": upload_input(analysis_id, "job_description", job_description)
+        }
+        
+        response = get_http_session().post(
             f"{API_BASE_URL}/analyze",
+            # The body is only the S3 keys, so it is sent uncompressed
             headers={"Content-Type": "application/json"},
-            json=payload,
+            data=orjson.dumps(payload),
             timeout=30
         )
         
         if response.status_code == 202:
-            return {"success": True, "data": response.json()}
+            return {"success": True, "data": orjson.loads(response.content)}
         else:
+            invalidate_system_health()
             return {"success": False, "error": f"HTTP {response.status_code}: {response.text}"}
             
     except requests.exceptions.RequestException as e:
+        invalidate_system_health()
         return {"success": False, "error": str(e)}
 
 def get_analysis_results(analysis_id):
     """Get analysis results from API"""
+    import requests
+    
+    # A plain request: st_autorefresh drives the poll cadence, so the script
+    # thread is never held waiting on the server.
+    # partial=1 asks for skills already found while the analysis is processing.
+    # "retryable" marks failures worth polling again: network errors, 5xx, and
+    # 404s (the record may not be visible yet right after submit)
     try:
-        response = requests.get(f"{API_BASE_URL}/results/{analysis_id}", timeout=10)
+        response = get_http_session().get(
+            f"{API_BASE_URL}/results/{analysis_id}",
+            params={"partial": 1},
+            timeout=10
+        )
         
         if response.status_code == 200:
-            return {"success": True, "data": response.json()}
+            return {"success": True, "data": orjson.loads(response.content)}
         elif response.status_code == 404:
-            return {"success": False, "error": "Analysis not found"}
+            return {"success": False, "retryable": True, "error": "Analysis not found"}
         else:
-            return {"success": False, "error": f"HTTP {response.status_code}: {response.text}"}
+            invalidate_system_health()
+            return {
+                "success": False,
+                "retryable": response.status_code >= 500,
+                "error": f"HTTP {response.status_code}: {response.text}"
+            }
             
     except requests.exceptions.RequestException as e:
-        return {"success": False, "error": str(e)}
+        invalidate_system_health()
+        return {"success": False, "retryable": True, "error": str(e)}
 
-def poll_for_results(analysis_id, max_attempts=30, interval=2):
-    """Poll for analysis results with progress tracking"""
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+def poll_for_results(analysis_id, max_wait=60, base_delay=1.0, max_delay=15.0):
+    """Advance polling for an analysis by at most one request
     
-    for attempt in range(max_attempts):
-        progress = (attempt + 1) / max_attempts
-        progress_bar.progress(progress)
-        status_text.text(f"🔄 Analyzing... Attempt {attempt + 1}/{max_attempts}")
-        
-        result = get_analysis_results(analysis_id)
-        
-        if result["success"]:
-            data = result["data"]
-            
-            if data["status"] == "completed":
-                progress_bar.progress(1.0)
-                status_text.text("✅ Analysis completed!")
-                time.sleep(1)  # Brief pause to show completion
-                progress_bar.empty()
-                status_text.empty()
-                return {"success": True, "data": data}
-            elif data["status"] == "failed":
-                progress_bar.empty()
-                status_text.empty()
-                return {"success": False, "error": data.get("error", "Analysis failed")}
-            # Continue polling if status is "processing"
-        else:
-            progress_bar.empty()
-            status_text.empty()
-            return result
+    Polling state lives in st.session_state.analyses[analysis_id]. Returns the
+    final result once the analysis finishes, or None while it is still
+    processing so the caller can schedule a rerun for the next poll.
+    """
+    state = st.session_state.analyses[analysis_id]
+    
+    elapsed = time.monotonic() - state["submitted_ts"]
+    remaining = max_wait - elapsed
+    if remaining <= 0:
+        state["status"] = "timeout"
+        return {"success": False, "error": "Analysis timeout - please try again"}
+    
+    st.progress(min(elapsed / max_wait, 1.0))
+    st.text(f"🔄 Analyzing... {int(elapsed)}s elapsed")
+    
+    # Not due yet: the backoff scheduled by the last poll is still running
+    if seconds_until_next_poll(analysis_id) > 0:
+        return None
+    
+    result = get_analysis_results(analysis_id)
+    state["last_poll_ts"] = time.monotonic()
+    state["last_response"] = result
+    
+    if result["success"]:
+        data = result["data"]
         
-        if attempt < max_attempts - 1:
-            time.sleep(interval)
+        if data["status"] == "completed":
+            state["status"] = "completed"
+            return {"success": True, "data": data}
+        elif data["status"] == "failed":
+            state["status"] = "failed"
+            return {"success": False, "error": data.get("error", "Analysis failed")}
+        # Continue polling if status is "processing"
+    elif not result.get("retryable"):
+        state["status"] = "failed"
+        return result
+    
+    # Back off exponentially with +/-20% jitter
+    state["next_backoff"] = min(max_delay, base_delay * (2 ** state["attempt"])) * (1 + random.uniform(-0.2, 0.2))
+    state["attempt"] += 1
+    return None
+
+def render_partial_results(analysis_id, placeholder):
+    """Render skills gaps found so far, from the latest processing response"""
+    last_response = st.session_state.analyses[analysis_id]["last_response"]
+    if not last_response or not last_response["success"]:
+        return
     
-    progress_bar.empty()
-    status_text.empty()
-    return {"success": False, "error": "Analysis timeout - please try again"}
+    missing_skills = last_response["data"].get("missing_skills")
+    if missing_skills:
+        skills_html = "".join(f'<span class="skill-tag">{skill}</span> ' for skill in missing_skills)
+        placeholder.markdown(f'**Skills gaps found so far:**<div style="margin: 1rem 0;">{skills_html}</div>', unsafe_allow_html=True)
+
+def seconds_until_next_poll(analysis_id):
+    """Time left before the next scheduled poll of an analysis"""
+    state = st.session_state.analyses[analysis_id]
+    return max(0, state["last_poll_ts"] + state["next_backoff"] - time.monotonic())
+
+@st.cache_resource
+def _read_sample_file(name):
+    """Read a bundled sample text file once per process"""
+    return (Path(__file__).parent / name).read_text(encoding="utf-8").rstrip("\n")
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
 def get_sample_data():
     """Get sample resume and job description data"""
     return {
-        "sample_resume": """John Doe
-Software Engineer
-
-EXPERIENCE
-==========
-Senior Software Developer | TechCorp Inc. | 2020-Present
-• Led development of microservices architecture serving 1M+ users
-• Improved application performance by 40% through code optimization
-• Mentored team of 3 junior developers
-• Technologies: Python, React, AWS, Docker, PostgreSQL
-
-Software Developer | StartupXYZ | 2018-2020
-• Built full-stack web applications using modern frameworks
-• Implemented CI/CD pipelines reducing deployment time by 60%
-• Collaborated with cross-functional teams in agile environment
-• Technologies: JavaScript, Node.js, MongoDB, Git
-
-SKILLS
-======
-• Programming: Python, JavaScript, Java, SQL
-• Frameworks: React, Node.js, Express, Django
-• Cloud: AWS (EC2, S3, Lambda, RDS), Docker, Kubernetes
-• Databases: PostgreSQL, MongoDB, Redis
-• Tools: Git, Jenkins, JIRA, Terraform
-
-EDUCATION
-=========
-• Bachelor of Science in Computer Science | State University | 2018
-• AWS Certified Solutions Architect - Associate
-• Certified Kubernetes Administrator (CKA)
-
-ACHIEVEMENTS
-============
-• Led migration to cloud infrastructure saving company $50K annually
-• Open source contributor with 500+ GitHub stars
-• Speaker at 3 tech conferences on microservices architecture""",
-        
-        "sample_job": """Senior Software Engineer - Cloud Platform Team
-
-COMPANY: InnovateTech Solutions
-LOCATION: Remote / San Francisco, CA
-SALARY: $120,000 - $160,000
-
-ABOUT THE ROLE
-==============
-We are seeking a Senior Software Engineer to join our Cloud Platform team. You will be responsible for designing and building scalable cloud-native applications that serve millions of users worldwide.
-
-REQUIREMENTS
-============
-• 5+ years of software development experience
-• Strong proficiency in Python and JavaScript
-• Experience with React and modern frontend frameworks
-• Deep knowledge of AWS cloud services (EC2, S3, Lambda, RDS)
-• Experience with containerization (Docker, Kubernetes)
-• Strong understanding of microservices architecture
-• Experience with CI/CD pipelines and DevOps practices
-• Excellent problem-solving and communication skills
-• Experience leading development teams
-• Bachelor's degree in Computer Science or related field
-
-PREFERRED QUALIFICATIONS
-========================
-• Experience with Infrastructure as Code (Terraform, CloudFormation)
-• Knowledge of monitoring and observability tools
-• AWS certifications (Solutions Architect, Developer)
-• Experience with agile development methodologies
-• Open source contributions
-• Experience with high-traffic, distributed systems
-
-RESPONSIBILITIES
-================
-• Design and develop scalable cloud-native applications
-• Lead technical discussions and architecture decisions
-• Mentor junior developers and conduct code reviews
-• Collaborate with product managers and designers
-• Ensure code quality and implement best practices
-• Participate in on-call rotation for production systems
-• Drive continuous improvement initiatives
-
-BENEFITS
-========
-• Competitive salary and equity package
-• Comprehensive health, dental, and vision insurance
-• Flexible PTO and remote work options
-• $2,000 annual learning and development budget
-• Top-tier equipment and home office setup allowance"""
+        "sample_resume": _read_sample_file("sample_resume.txt"),
+        "sample_job": _read_sample_file("sample_job.txt")
     }
 
 def generate_text_report(results):
     """Generate a formatted text report"""
-    report = f"""
+    missing_skills = "\n".join(f"• {skill}" for skill in results['missing_skills'])
+    recommendations = "\n".join(f"{i}. {rec}" for i, rec in enumerate(results['recommendations'], 1))
+    
+    parts = [
+        f"""
 NextFitAI Resume Analysis Report
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
@@ -256,27 +305,13 @@ Confidence Score: {results['confidence_score']}%
 Analysis Date: {results['analysis_timestamp']}
 
 MISSING SKILLS ANALYSIS
-=======================
-"""
-    
-    if results['missing_skills']:
-        for skill in results['missing_skills']:
-            report += f"• {skill}\n"
-    else:
-        report += "✅ No critical missing skills identified.\n"
-    
-    report += f"""
+=======================""",
+        missing_skills or "✅ No critical missing skills identified.",
+        """
 IMPROVEMENT RECOMMENDATIONS
-===========================
-"""
-    
-    if results['recommendations']:
-        for i, rec in enumerate(results['recommendations'], 1):
-            report += f"{i}. {rec}\n"
-    else:
-        report += "✅ No specific recommendations at this time.\n"
-    
-    report += f"""
+===========================""",
+        recommendations or "✅ No specific recommendations at this time.",
+        """
 NEXT STEPS
 ==========
 1. Address the missing skills through training or certification
@@ -287,15 +322,31 @@ NEXT STEPS
 Generated by NextFitAI Resume Analyzer
 https://github.com/your-repo/NextFitAI-Backend
 """
+    ]
     
-    return report
+    return "\n".join(parts)
+
+def parse_timestamp(timestamp):
+    """Parse an ISO 8601 timestamp, including a trailing 'Z' UTC designator"""
+    # datetime.fromisoformat understands 'Z' natively from Python 3.11
+    if sys.version_info < (3, 11) and timestamp.endswith('Z'):
+        timestamp = timestamp[:-1] + '+00:00'
+    return datetime.fromisoformat(timestamp)
+
+@st.cache_data(max_entries=32)
+def serialize_results(analysis_id, _results):
+    """JSON and text report downloads for an analysis, computed once per analysis ID"""
+    # Completed results never change, so the unhashed _results is keyed by analysis_id alone
+    return orjson.dumps(_results, option=orjson.OPT_INDENT_2).decode(), generate_text_report(_results)
 
-def display_results(results):
+def display_results(results, analysis_id):
     """Display analysis results in a beautiful format"""
     
     st.markdown("---")
     st.markdown('<div class="main-header"><h1>📊 Analysis Results</h1></div>', unsafe_allow_html=True)
     
+    analysis_date = parse_timestamp(results['analysis_timestamp'])
+    
     # Key metrics row
     col1, col2, col3 = st.columns(3)
     
@@ -313,7 +364,6 @@ def display_results(results):
         )
     
     with col3:
-        analysis_date = datetime.fromisoformat(results['analysis_timestamp'].replace('Z', '+00:00'))
         st.metric(
             label="📅 Analysis Date",
             value=analysis_date.strftime("%Y-%m-%d")
@@ -341,10 +391,9 @@ def display_results(results):
         st.markdown("### 🔧 Skills Gap Analysis")
         
         # Create skill tags with better styling
-        skills_html = '<div style="margin: 1rem 0;">'
-        for skill in results['missing_skills']:
-            skills_html += f'<span class="skill-tag">{skill}</span> '
-        skills_html += '</div>'
+        skills_html = '<div style="margin: 1rem 0;">' + "".join(
+            f'<span class="skill-tag">{skill}</span> ' for skill in results['missing_skills']
+        ) + '</div>'
         
         st.markdown(skills_html, unsafe_allow_html=True)
         
@@ -363,12 +412,11 @@ def display_results(results):
     if results['recommendations']:
         st.markdown("### 💡 Personalized Recommendations")
         
-        for i, recommendation in enumerate(results['recommendations'], 1):
-            st.markdown(f"""
-            <div class="recommendation-item">
-                <strong>{i}.</strong> {recommendation}
-            </div>
-            """, unsafe_allow_html=True)
+        recommendations_html = "".join(
+            f'<div class="recommendation-item"><strong>{i}.</strong> {recommendation}</div>'
+            for i, recommendation in enumerate(results['recommendations'], 1)
+        )
+        st.markdown(recommendations_html, unsafe_allow_html=True)
     
     # Action items
     st.markdown("### 🎯 Next Steps")
@@ -381,17 +429,16 @@ def display_results(results):
         "Network with professionals in your target role"
     ]
     
-    for item in action_items:
-        st.markdown(f"- {item}")
+    st.markdown("\n".join(f"- {item}" for item in action_items))
     
     # Export section
     st.markdown("### 📥 Export Your Results")
+    results_json, report = serialize_results(analysis_id, results)
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
         # JSON download
-        results_json = json.dumps(results, indent=2)
         st.download_button(
             label="📄 Download JSON",
             data=results_json,
@@ -402,7 +449,6 @@ def display_results(results):
     
     with col2:
         # Text report download
-        report = generate_text_report(results)
         st.download_button(
             label="📝 Download Report",
             data=report,
@@ -416,35 +462,114 @@ def display_results(results):
         if st.button("🔗 Share Results", use_container_width=True):
             st.info("Share functionality coming soon!")
 
+def get_analysis_cache_key(resume_text, job_description):
+    """Hash the inputs so identical submissions can reuse an earlier analysis"""
+    return hashlib.blake2b((resume_text + "\0" + job_description).encode(), digest_size=16).hexdigest()
+
+def forget_cached_analysis(cache_key):
+    """Drop a cached analysis so the next submit runs a fresh one"""
+    st.session_state.analysis_cache.pop(cache_key, None)
+
 def analyze_resume(resume_text, job_description):
     """Handle the complete analysis workflow"""
+    import uuid
+    
+    # Reuse a recent analysis of identical inputs instead of resubmitting
+    cache_key = get_analysis_cache_key(resume_text, job_description)
+    cached = st.session_state.analysis_cache.get(cache_key)
+    if cached and time.time() - cached["ts"] < ANALYSIS_CACHE_TTL:
+        if cached["results"] is not None:
+            st.session_state.current_analysis_id = cached["id"]
+            st.info(f"♻️ Showing results of an identical analysis (`{cached['id']}`)")
+            st.button("🔁 Re-analyze", on_click=forget_cached_analysis, args=(cache_key,))
+            display_results(cached["results"], cached["id"])
+            return
+        if cached["id"] == get_in_flight_analysis_id():
+            track_analysis(cached["id"])
+            return
+    
+    # Retrying a failed submit of the same inputs keeps its analysis ID, so
+    # the presigned upload URLs issued for it are reused
+    analysis_id = st.session_state.pending_submissions.setdefault(cache_key, str(uuid.uuid4()))
     
     # Submit analysis
     with st.spinner("🚀 Submitting analysis..."):
-        result = submit_analysis(resume_text, job_description)
+        result = submit_analysis(analysis_id, resume_text, job_description)
     
     if not result["success"]:
         st.error(f"❌ Failed to submit analysis: {result['error']}")
         return
     
-    analysis_id = result["data"]["analysis_id"]
+    del st.session_state.pending_submissions[cache_key]
     st.success(f"✅ Analysis submitted successfully!")
     st.info(f"📋 Analysis ID: `{analysis_id}`")
     
-    # Store in session state for persistence
+    # Store in session state for persistence across reruns
+    st.session_state.analysis_cache[cache_key] = {"id": analysis_id, "results": None, "ts": time.time()}
+    st.session_state.analyses[analysis_id] = {
+        "cache_key": cache_key,
+        "status": "processing",
+        "submitted_ts": time.monotonic(),
+        "last_poll_ts": 0,
+        "last_response": None,
+        "result": None,
+        "next_backoff": 0,
+        "attempt": 0
+    }
     st.session_state.current_analysis_id = analysis_id
     
-    # Poll for results
-    st.markdown("### 🔄 Processing Your Analysis")
-    st.markdown("Please wait while our AI analyzes your resume against the job requirements...")
-    
-    with st.container():
-        result = poll_for_results(analysis_id)
+    track_analysis(analysis_id)
+
+def get_in_flight_analysis_id():
+    """Return the current analysis ID if it is still being processed"""
+    analysis_id = st.session_state.current_analysis_id
+    state = st.session_state.analyses.get(analysis_id)
+    if state and state["status"] == "processing":
+        return analysis_id
+    return None
+
+@st.fragment
+def track_analysis(analysis_id):
+    """Show progress for an analysis and display the outcome once it finishes
+    
+    Runs as a fragment: the timed poll reruns below only re-execute this panel,
+    not the whole script with its text areas and sidebar. Widgets in the results
+    panel (downloads, share) also rerun it, so a finished analysis is rendered
+    from its stored outcome without polling or saving it to history again.
+    """
+    state = st.session_state.analyses[analysis_id]
+    
+    if state["status"] == "processing":
+        st.markdown("### 🔄 Processing Your Analysis")
+        st.markdown("Please wait while our AI analyzes your resume against the job requirements...")
+        
+        with st.container():
+            result = poll_for_results(analysis_id)
+            partial_placeholder = st.empty()
+        
+        if result is None:
+            # Surface skills the backend has already extracted from the agent's partial answer
+            render_partial_results(analysis_id, partial_placeholder)
+            
+            # Still processing: trigger a rerun of this fragment when the next poll
+            # is due instead of sleeping in the script thread
+            interval_ms = max(100, int(seconds_until_next_poll(analysis_id) * 1000))
+            st_autorefresh(interval=interval_ms, key=f"poll_{analysis_id}")
+            return
+        
+        # First rerun after the analysis finished: record the outcome once
+        state["result"] = result
+        if result["success"]:
+            cached = st.session_state.analysis_cache.get(state["cache_key"])
+            if cached and cached["id"] == analysis_id:
+                cached["results"] = result["data"]["results"]
+            
+            # Save to history
+            save_analysis_to_history(analysis_id, result["data"]["results"])
     
+    result = state["result"]
     if result["success"]:
-        # Save to history
-        save_analysis_to_history(analysis_id, result["data"]["results"])
-        display_results(result["data"]["results"])
+        display_results(result["data"]["results"], analysis_id)
     else:
         st.error(f"❌ Analysis failed: {result['error']}")
         st.info("💡 Please try again or contact support if the issue persists.")
@@ -452,19 +577,18 @@ def analyze_resume(resume_text, job_description):
 def save_analysis_to_history(analysis_id, results):
     """Save analysis to session state history"""
     if 'analysis_history' not in st.session_state:
-        st.session_state.analysis_history = []
+        st.session_state.analysis_history = deque(maxlen=10)
     
+    now = datetime.now()
     analysis_record = {
         "id": analysis_id,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
+        "date": now.strftime("%Y-%m-%d"),
         "results": results
     }
     
+    # Bounded deque keeps only the last 10 analyses
     st.session_state.analysis_history.append(analysis_record)
-    
-    # Keep only last 10 analyses
-    if len(st.session_state.analysis_history) > 10:
-        st.session_state.analysis_history = st.session_state.analysis_history[-10:]
 
 def show_analysis_history():
     """Display analysis history"""
@@ -472,7 +596,7 @@ def show_analysis_history():
         st.header("📚 Analysis History")
         
         for analysis in reversed(st.session_state.analysis_history):
-            with st.expander(f"Analysis {analysis['id'][:8]}... - {analysis['timestamp'][:10]}"):
+            with st.expander(f"Analysis {analysis['id'][:8]}... - {analysis['date']}"):
                 col1, col2 = st.columns(2)
                 
                 with col1:
@@ -481,17 +605,31 @@ def show_analysis_history():
                 
                 with col2:
                     st.write("**Missing Skills:**")
-                    for skill in analysis['results']['missing_skills']:
-                        st.write(f"• {skill}")
+                    st.markdown("\n".join(f"- {skill}" for skill in analysis['results']['missing_skills']))
                 
                 if st.button(f"View Full Results", key=f"view_{analysis['id']}"):
-                    display_results(analysis['results'])
+                    display_results(analysis['results'], analysis['id'])
     else:
         st.info("No analysis history available. Complete an analysis to see your history here.")
 
+def _is_blank(text):
+    """True if text is empty or only whitespace, without building a stripped copy"""
+    return not text or text.isspace()
+
+def _too_short(text, min_length=50):
+    """True if text has at most min_length characters once surrounding whitespace is dropped"""
+    if len(text) <= min_length:
+        return True
+    # Only pay for the .strip() copy when there is surrounding whitespace to drop
+    if not (text[0].isspace() or text[-1].isspace()):
+        return False
+    return len(text.strip()) <= min_length
+
 def main():
     """Main application function"""
     
+    _inject_css()
+    
     # Header
     st.markdown('<div class="main-header"><h1>🎯 NextFitAI Resume Analyzer</h1><p>AI-powered resume analysis to optimize your job applications</p></div>', unsafe_allow_html=True)
     
@@ -500,16 +638,21 @@ def main():
         st.header("🔍 System Status")
         
         if st.button("🔄 Check Health", type="secondary"):
-            with st.spinner("Checking system health..."):
-                health = check_system_health()
-            
-            if health.get("status") == "healthy":
-                st.success("✅ System Healthy")
-                with st.expander("System Details"):
-                    st.json(health["checks"])
-            else:
-                st.error("❌ System Issues")
-                st.json(health)
+            # An explicit click always re-queries the API
+            invalidate_system_health()
+        
+        # Shown on every rerun from the cached response; only the first load, the
+        # button and failed API calls (which invalidate it) query /health
+        with st.spinner("Checking system health..."):
+            health = check_system_health()
+        
+        if health.get("status") == "healthy":
+            st.success("✅ System Healthy")
+            with st.expander("System Details"):
+                st.json(health["checks"])
+        else:
+            st.error("❌ System Issues")
+            st.json(health)
         
         st.markdown("---")
         
@@ -541,60 +684,84 @@ def main():
     # Main content area
     st.markdown("### 📄 Input Your Information")
     
-    col1, col2 = st.columns([1, 1])
-    
-    with col1:
-        st.markdown("#### Resume Content")
-        resume_text = st.text_area(
-            "Paste your resume content here:",
-            height=400,
-            placeholder="John Doe\nSoftware Engineer\n\nExperience:\n• 5+ years in Python development...",
-            help="Copy and paste your complete resume text. Include all sections: experience, skills, education, etc.",
-            value=st.session_state.get('sample_resume', '')
-        )
-    
-    with col2:
-        st.markdown("#### Job Description")
-        job_description = st.text_area(
-            "Paste the job description here:",
-            height=400,
-            placeholder="Senior Software Engineer\n\nWe are seeking...\n\nRequirements:\n• 5+ years experience...",
-            help="Copy and paste the complete job description you want to match against.",
-            value=st.session_state.get('sample_job', '')
-        )
-    
-    # Input validation
-    resume_valid = len(resume_text.strip()) > 50
-    job_valid = len(job_description.strip()) > 50
+    # Inside a form, editing the text areas does not rerun the script; the
+    # values are only sent when the form is submitted
+    with st.form("analysis_form", border=False):
+        col1, col2 = st.columns([1, 1])
+        
+        with col1:
+            st.markdown("#### Resume Content")
+            resume_text = st.text_area(
+                "Paste your resume content here:",
+                height=400,
+                placeholder="John Doe\nSoftware Engineer\n\nExperience:\n• 5+ years in Python development...",
+                help="Copy and paste your complete resume text. Include all sections: experience, skills, education, etc.",
+                value=st.session_state.get('sample_resume', '')
+            )
+        
+        with col2:
+            st.markdown("#### Job Description")
+            job_description = st.text_area(
+                "Paste the job description here:",
+                height=400,
+                placeholder="Senior Software Engineer\n\nWe are seeking...\n\nRequirements:\n• 5+ years experience...",
+                help="Copy and paste the complete job description you want to match against.",
+                value=st.session_state.get('sample_job', '')
+            )
+        
+        col1, col2, col3 = st.columns([1, 2, 1])
+        
+        with col2:
+            st.markdown("---")
+            
+            # Analysis button
+            submitted = st.form_submit_button("🚀 Analyze Resume", type="primary", use_container_width=True)
+            
+            # Input validation
+            resume_valid = not _too_short(resume_text)
+            job_valid = not _too_short(job_description)
+            
+            # Show validation status
+            if submitted and not _is_blank(resume_text) and not resume_valid:
+                st.warning("⚠️ Resume text seems too short. Please provide more details.")
+            
+            if submitted and not _is_blank(job_description) and not job_valid:
+                st.warning("⚠️ Job description seems too short. Please provide more details.")
+            
+            if _is_blank(resume_text) or _is_blank(job_description):
+                st.info("💡 Fill in both fields above to start your analysis")
+            elif submitted and not (resume_valid and job_valid):
+                st.info("💡 Please provide more detailed content for accurate analysis")
     
     col1, col2, col3 = st.columns([1, 2, 1])
     
     with col2:
-        st.markdown("---")
-        
-        # Show validation status
-        if resume_text.strip() and not resume_valid:
-            st.warning("⚠️ Resume text seems too short. Please provide more details.")
-        
-        if job_description.strip() and not job_valid:
-            st.warning("⚠️ Job description seems too short. Please provide more details.")
-        
-        # Analysis button
-        if st.button("🚀 Analyze Resume", type="primary", use_container_width=True, disabled=not (resume_valid and job_valid)):
+        # Widgets such as the Re-analyze button cannot live inside the form
+        if submitted and resume_valid and job_valid:
             analyze_resume(resume_text, job_description)
-        
-        if not resume_text.strip() or not job_description.strip():
-            st.info("💡 Fill in both fields above to start your analysis")
-        elif not (resume_valid and job_valid):
-            st.info("💡 Please provide more detailed content for accurate analysis")
+        elif get_in_flight_analysis_id():
+            # Timed rerun (or a widget interaction) while polling; pick up where it left off
+            track_analysis(get_in_flight_analysis_id())
 
 # Initialize session state
 if 'analysis_history' not in st.session_state:
-    st.session_state.analysis_history = []
+    st.session_state.analysis_history = deque(maxlen=10)
 
 if 'current_analysis_id' not in st.session_state:
     st.session_state.current_analysis_id = None
 
+if 'analyses' not in st.session_state:
+    st.session_state.analyses = {}
+
+if 'analysis_cache' not in st.session_state:
+    st.session_state.analysis_cache = {}
+
+if 'pending_submissions' not in st.session_state:
+    st.session_state.pending_submissions = {}
+
+if 'upload_urls' not in st.session_state:
+    st.session_state.upload_urls = {}
+
 if 'show_history' not in st.session_state:
     st.session_state.show_history = False
 
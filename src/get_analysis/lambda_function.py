@@ -1,16 +1,76 @@
-import json
+import orjson
 import boto3
+import hashlib
 import os
+from boto3.dynamodb.types import TypeDeserializer
 import re
-from datetime import datetime
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 from decimal import Decimal
 
-class DecimalEncoder(json.JSONEncoder):
-    """Custom JSON encoder to handle DynamoDB Decimal types"""
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# Tracking statuses reported to clients as "processing"
+PENDING_STATUSES = ('SUBMITTED', 'PROCESSING')
+
+# /health results are reused for this long by a warm container, so frequent
+# health polling does not hit describe_table/head_bucket on every request
+HEALTH_CACHE_TTL_SECONDS = 30
+_HEALTH_CACHE = {'checked_at': 0.0, 'result': None}
+
+# BatchGetItem accepts at most 100 keys per call; unprocessed keys are retried
+# with exponential backoff
+BATCH_GET_LIMIT = 100
+BATCH_MAX_RETRIES = 5
+BATCH_BACKOFF_BASE_SECONDS = 0.05
+
+# COMPLETED results never change (submit refuses to reuse an analysis_id,
+# so the record cannot be replaced), so a warm container keeps the serialized
+# response body and ETag for recently requested analyses (LRU, by analysis_id)
+# and answers repeat requests without reading DynamoDB
+COMPLETED_CACHE_SIZE = 1024
+_COMPLETED_CACHE = OrderedDict()
+
+# AWS clients are created once per container and reused by warm invocations.
+# Missing environment variables are reported by the /health checks.
+TRACKING_TABLE = os.environ.get('TRACKING_TABLE')
+RAW_INPUTS_BUCKET = os.environ.get('RAW_INPUTS_BUCKET')
+_DDB_CLIENT = boto3.client('dynamodb')
+_DESERIALIZER = TypeDeserializer()
+_S3 = boto3.client('s3')
+
+# Patterns used to pull missing skills and recommendations out of the analysis
+# text, compiled once per container rather than on every request. Each is one
+# alternation so the text is scanned once per extractor. Captures run
+# to the end of the sentence and are capped at 200 characters so a long run of
+# text without a full stop cannot make a single match scan the whole input.
+_SKILL_RE = re.compile(
+    r'(?:missing|lacks?|should add|needs?|consider adding)[:\s]+([^.]{1,200})',
+    re.IGNORECASE
+)
+_REC_RE = re.compile(
+    r'(?:recommend[a-z]*|suggest[a-z]*|should|consider|improve[a-z]*)[:\s]+([^.]{1,200})',
+    re.IGNORECASE
+)
+
+# Fallbacks when nothing can be extracted; shared tuples, never mutated
+_DEFAULT_MOCK_SKILLS = ('Python', 'AWS', 'Docker')
+_DEFAULT_RECS = (
+    "Add quantified achievements (e.g., 'Increased efficiency by 25%')",
+    "Include relevant keywords from the job description",
+    "Highlight specific technical skills and experience",
+    "Use action verbs to describe accomplishments",
+    "Tailor resume content to match job requirements"
+)
+
+def decimal_default(obj):
+    """orjson fallback for DynamoDB Decimal types"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def to_json(obj):
+    """Serialize a response body with orjson"""
+    return orjson.dumps(obj, default=decimal_default).decode()
 
 def lambda_handler(event, context):
     """
@@ -40,7 +100,7 @@ def lambda_handler(event, context):
         return {
             'statusCode': 404,
             'headers': cors_headers,
-            'body': json.dumps({'error': 'Route not found'})
+            'body': to_json({'error': 'Route not found'})
         }
         
     except Exception as e:
@@ -51,7 +111,7 @@ def lambda_handler(event, context):
                 'Access-Control-Allow-Headers': 'Content-Type',
                 'Access-Control-Allow-Methods': 'GET,OPTIONS'
             },
-            'body': json.dumps({'error': str(e)})
+            'body': to_json({'error': str(e)})
         }
 
 def handle_get_results(event, context, cors_headers):
@@ -68,53 +128,53 @@ def handle_get_results(event, context, cors_headers):
             return {
                 'statusCode': 400,
                 'headers': cors_headers,
-                'body': json.dumps({'error': 'analysis_id is required'})
+                'body': to_json({'error': 'analysis_id is required'})
             }
         
-        # Query DynamoDB for the analysis
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(os.environ['TRACKING_TABLE'])
+        cached = _COMPLETED_CACHE.get(analysis_id)
+        if cached is not None:
+            _COMPLETED_CACHE.move_to_end(analysis_id)
+            etag, body = cached
+            return completed_response(event, cors_headers, etag, body)
         
-        response = table.get_item(
-            Key={'analysis_id': analysis_id}
+        # Query DynamoDB for the analysis
+        response = _DDB_CLIENT.get_item(
+            TableName=TRACKING_TABLE,
+            Key={'analysis_id': {'S': analysis_id}}
         )
+        item = unmarshal_item(response['Item']) if 'Item' in response else None
         
-        if 'Item' not in response:
+        if item is None:
             return {
                 'statusCode': 404,
                 'headers': cors_headers,
-                'body': json.dumps({'error': 'Analysis not found'})
+                'body': to_json({'error': 'Analysis not found'})
             }
         
-        item = response['Item']
         status = item.get('status', 'unknown')
         
         # Handle different status states
-        if status == 'SUBMITTED':
-            return {
-                'statusCode': 200,
-                'headers': cors_headers,
-                'body': json.dumps({
-                    'status': 'processing',
-                    'message': 'Analysis is queued for processing'
-                })
+        if status in PENDING_STATUSES:
+            body = {
+                'status': 'processing',
+                'message': 'Analysis is queued for processing' if status == 'SUBMITTED' else 'Analysis is currently being processed'
             }
-        
-        elif status == 'PROCESSING':
+            # ?partial=1: skills already found in the agent's answer streamed so far
+            partial_analysis = item.get('partial_analysis')
+            if partial_analysis and wants_partial(event):
+                body['message'] = 'Analysis is currently being processed'
+                body['missing_skills'] = list(extract_missing_skills(partial_analysis))
             return {
                 'statusCode': 200,
                 'headers': cors_headers,
-                'body': json.dumps({
-                    'status': 'processing',
-                    'message': 'Analysis is currently being processed'
-                })
+                'body': to_json(body)
             }
         
         elif status == 'FAILED':
             return {
                 'statusCode': 200,
                 'headers': cors_headers,
-                'body': json.dumps({
+                'body': to_json({
                     'status': 'failed',
                     'error': item.get('error_message', 'Analysis failed'),
                     'timestamp': item.get('completion_timestamp', item.get('timestamp'))
@@ -127,21 +187,23 @@ def handle_get_results(event, context, cors_headers):
             
             # Extract and format the results
             formatted_results = format_analysis_results(analysis_result)
+            body = to_json({
+                'status': 'completed',
+                'results': formatted_results
+            })
+            etag = make_etag(analysis_id, item.get('completion_timestamp', ''))
             
-            return {
-                'statusCode': 200,
-                'headers': cors_headers,
-                'body': json.dumps({
-                    'status': 'completed',
-                    'results': formatted_results
-                }, cls=DecimalEncoder)
-            }
+            _COMPLETED_CACHE[analysis_id] = (etag, body)
+            if len(_COMPLETED_CACHE) > COMPLETED_CACHE_SIZE:
+                _COMPLETED_CACHE.popitem(last=False)
+            
+            return completed_response(event, cors_headers, etag, body)
         
         else:
             return {
                 'statusCode': 200,
                 'headers': cors_headers,
-                'body': json.dumps({
+                'body': to_json({
                     'status': 'unknown',
                     'message': f'Unknown status: {status}'
                 })
@@ -151,14 +213,91 @@ def handle_get_results(event, context, cors_headers):
         return {
             'statusCode': 500,
             'headers': cors_headers,
-            'body': json.dumps({'error': f'Failed to retrieve analysis: {str(e)}'})
+            'body': to_json({'error': f'Failed to retrieve analysis: {str(e)}'})
+        }
+
+def make_etag(analysis_id, completion_timestamp):
+    """
+    Strong ETag for a completed analysis; the result is fixed once completion_timestamp is set
+    """
+    digest = hashlib.blake2b(f"{analysis_id}:{completion_timestamp}".encode('utf-8'), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+def get_header(event, name):
+    """
+    Case-insensitive request header lookup (API Gateway passes headers as sent by the client)
+    """
+    headers = event.get('headers') or {}
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+def completed_response(event, cors_headers, etag, body):
+    """
+    Response for a COMPLETED analysis: 304 Not Modified if the client already has this ETag
+    """
+    headers = {**cors_headers, 'ETag': etag}
+    if_none_match = get_header(event, 'If-None-Match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]):
+        return {
+            'statusCode': 304,
+            'headers': headers,
+            'body': ''
         }
+    
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': body
+    }
+
+def unmarshal_item(item):
+    """
+    Convert a low-level DynamoDB item ({'S': ...}, {'N': ...}, ...) to plain Python values
+    """
+    return {key: _DESERIALIZER.deserialize(value) for key, value in item.items()}
+
+def _batch_get_many(analysis_ids):
+    """
+    Fetch several tracking records with BatchGetItem
+    Returns {analysis_id: item} with plain Python values; ids that do not exist are omitted
+    """
+    items = {}
+    unique_ids = list(dict.fromkeys(analysis_ids))
+    for start in range(0, len(unique_ids), BATCH_GET_LIMIT):
+        request_items = {
+            TRACKING_TABLE: {
+                'Keys': [{'analysis_id': {'S': analysis_id}} for analysis_id in unique_ids[start:start + BATCH_GET_LIMIT]]
+            }
+        }
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = _DDB_CLIENT.batch_get_item(RequestItems=request_items)
+            for item in response['Responses'].get(TRACKING_TABLE, []):
+                record = unmarshal_item(item)
+                items[record['analysis_id']] = record
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                break
+            if attempt == BATCH_MAX_RETRIES:
+                raise RuntimeError('BatchGetItem left unprocessed keys after retries')
+            time.sleep(BATCH_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return items
+
+def wants_partial(event):
+    """
+    True if the ?partial= query parameter asks for partial results of a pending analysis
+    """
+    query_parameters = event.get('queryStringParameters') or {}
+    return query_parameters.get('partial', '').lower() in ('1', 'true')
 
 def handle_health_check(event, context, cors_headers):
     """
     Handle GET /health
     Returns system health status
     """
+    now = datetime.now(timezone.utc).isoformat()
     try:
         # Perform basic health checks
         health_status = perform_health_checks()
@@ -167,9 +306,9 @@ def handle_health_check(event, context, cors_headers):
             return {
                 'statusCode': 200,
                 'headers': cors_headers,
-                'body': json.dumps({
+                'body': to_json({
                     'status': 'healthy',
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': now,
                     'checks': health_status['checks']
                 })
             }
@@ -177,9 +316,9 @@ def handle_health_check(event, context, cors_headers):
             return {
                 'statusCode': 503,
                 'headers': cors_headers,
-                'body': json.dumps({
+                'body': to_json({
                     'status': 'unhealthy',
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': now,
                     'checks': health_status['checks']
                 })
             }
@@ -188,9 +327,9 @@ def handle_health_check(event, context, cors_headers):
         return {
             'statusCode': 500,
             'headers': cors_headers,
-            'body': json.dumps({
+            'body': to_json({
                 'status': 'error',
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': now,
                 'error': str(e)
             })
         }
@@ -201,7 +340,7 @@ def format_analysis_results(analysis_result):
     """
     match_score = analysis_result.get('match_score', 0)
     analysis_text = analysis_result.get('analysis', '')
-    timestamp = analysis_result.get('timestamp', datetime.now().isoformat())
+    timestamp = analysis_result.get('timestamp') or datetime.now(timezone.utc).isoformat()
     is_mock = analysis_result.get('is_mock', False)
     
     # Extract missing skills from analysis text
@@ -225,36 +364,25 @@ def extract_missing_skills(analysis_text):
     """
     Extract missing skills from the analysis text
     """
-    missing_skills = []
+    # Insertion-ordered dict removes duplicates while keeping the order skills appear in
+    missing_skills = {}
     
     # Look for common skill patterns in the analysis
-    skill_patterns = [
-        r'missing[:\s]+([^.]+)',
-        r'lacks?[:\s]+([^.]+)',
-        r'should add[:\s]+([^.]+)',
-        r'needs?[:\s]+([^.]+)',
-        r'consider adding[:\s]+([^.]+)'
-    ]
-    
-    for pattern in skill_patterns:
-        matches = re.findall(pattern, analysis_text, re.IGNORECASE)
-        for match in matches:
-            # Clean up the match and extract individual skills
-            skills = [skill.strip().strip('"\'') for skill in match.split(',')]
-            missing_skills.extend(skills)
-    
-    # Common technical skills to look for
-    common_skills = ['Python', 'AWS', 'Docker', 'Kubernetes', 'React', 'Node.js', 'SQL', 'Git', 'CI/CD', 'Agile']
+    for match in _SKILL_RE.finditer(analysis_text):
+        # Clean up the match and extract individual skills
+        for skill in match.group(1).split(','):
+            missing_skills[skill.strip().strip('"\'')] = None
+        # Stop scanning once there are enough skills to return
+        if len(missing_skills) >= 5:
+            break
     
     # If no specific missing skills found, infer from common skills not mentioned
     if not missing_skills and 'mock' in analysis_text.lower():
         # For mock analysis, suggest some common skills
-        missing_skills = ['Python', 'AWS', 'Docker']
-    
-    # Remove duplicates and limit to reasonable number
-    missing_skills = list(set(missing_skills))[:5]
+        return _DEFAULT_MOCK_SKILLS
     
-    return missing_skills
+    # Limit to reasonable number
+    return list(missing_skills)[:5]
 
 def extract_recommendations(analysis_text):
     """
@@ -263,30 +391,14 @@ def extract_recommendations(analysis_text):
     recommendations = []
     
     # Look for recommendation patterns
-    rec_patterns = [
-        r'recommend[a-z]*[:\s]+([^.]+)',
-        r'suggest[a-z]*[:\s]+([^.]+)',
-        r'should[:\s]+([^.]+)',
-        r'consider[:\s]+([^.]+)',
-        r'improve[a-z]*[:\s]+([^.]+)'
-    ]
-    
-    for pattern in rec_patterns:
-        matches = re.findall(pattern, analysis_text, re.IGNORECASE)
-        for match in matches:
-            recommendation = match.strip().strip('"\'')
-            if len(recommendation) > 10:  # Filter out very short matches
-                recommendations.append(recommendation)
+    for match in _REC_RE.findall(analysis_text):
+        recommendation = match.strip().strip('"\'')
+        if len(recommendation) > 10:  # Filter out very short matches
+            recommendations.append(recommendation)
     
     # If no specific recommendations found, provide default ones
     if not recommendations:
-        recommendations = [
-            "Add quantified achievements (e.g., 'Increased efficiency by 25%')",
-            "Include relevant keywords from the job description",
-            "Highlight specific technical skills and experience",
-            "Use action verbs to describe accomplishments",
-            "Tailor resume content to match job requirements"
-        ]
+        return _DEFAULT_RECS
     
     # Limit to reasonable number
     return recommendations[:5]
@@ -326,16 +438,19 @@ def calculate_confidence_score(analysis_result, match_score, is_mock):
 def perform_health_checks():
     """
     Perform basic health checks on system components
+    Results are cached per container for HEALTH_CACHE_TTL_SECONDS
     """
+    now = time.monotonic()
+    if _HEALTH_CACHE['result'] is not None and now - _HEALTH_CACHE['checked_at'] < HEALTH_CACHE_TTL_SECONDS:
+        return _HEALTH_CACHE['result']
+    
     checks = {}
     overall_healthy = True
     
     # Check DynamoDB connectivity
     try:
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(os.environ['TRACKING_TABLE'])
         # Simple operation to test connectivity
-        table.meta.client.describe_table(TableName=os.environ['TRACKING_TABLE'])
+        _DDB_CLIENT.describe_table(TableName=TRACKING_TABLE)
         checks['dynamodb'] = {'status': 'healthy', 'message': 'Connected successfully'}
     except Exception as e:
         checks['dynamodb'] = {'status': 'unhealthy', 'message': str(e)}
@@ -343,9 +458,7 @@ def perform_health_checks():
     
     # Check S3 connectivity
     try:
-        s3_client = boto3.client('s3')
-        bucket_name = os.environ['RAW_INPUTS_BUCKET']
-        s3_client.head_bucket(Bucket=bucket_name)
+        _S3.head_bucket(Bucket=RAW_INPUTS_BUCKET)
         checks['s3'] = {'status': 'healthy', 'message': 'Bucket accessible'}
     except Exception as e:
         checks['s3'] = {'status': 'unhealthy', 'message': str(e)}
@@ -364,7 +477,10 @@ def perform_health_checks():
     else:
         checks['environment'] = {'status': 'healthy', 'message': 'All required variables present'}
     
-    return {
+    result = {
         'healthy': overall_healthy,
         'checks': checks
     }
+    _HEALTH_CACHE['checked_at'] = now
+    _HEALTH_CACHE['result'] = result
+    return result
@@ -1,113 +1,200 @@
-import json
+import orjson
 import boto3
+import codecs
+import hashlib
 import os
-from datetime import datetime
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError, HTTPClientError
+from datetime import datetime, timezone
+
+# Match score patterns in priority order: an explicit "Match score: 85" wins over
+# "Score: 85", then "85/100", then "85%", wherever each appears in the text
+_SCORE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'match score[:\s]+(\d+)',
+    r'score[:\s]+(\d+)',
+    r'(\d+)/100',
+    r'(\d+)%'
+))
+# Word tokens used for mock keyword matching
+_WORD_RE = re.compile(r'[A-Za-z]+')
+# Bedrock Agent session IDs: 2-100 characters from [0-9a-zA-Z._:-]
+_SESSION_ID_RE = re.compile(r'[0-9a-zA-Z._:-]{2,100}')
+
+# S3 text inputs are decoded in chunks of this size
+S3_READ_CHUNK_SIZE = 64 * 1024
+
+# While the Bedrock Agent streams its answer, the text so far is saved to the
+# tracking record (partial_analysis) at most this often, for GET /results?partial=1
+PARTIAL_WRITE_INTERVAL_SECONDS = 5
+
+# AWS error codes (compared lower-cased) for throttling and service-side faults;
+# these are worth retrying by letting SQS redeliver the message
+TRANSIENT_ERROR_CODES = frozenset(code.lower() for code in (
+    'ThrottlingException', 'ProvisionedThroughputExceededException', 'RequestLimitExceeded',
+    'TooManyRequestsException', 'TransactionConflictException', 'SlowDown', 'RequestTimeout',
+    'InternalError', 'InternalServerError', 'InternalServerException', 'ServiceUnavailable',
+    'ServiceUnavailableException', 'DependencyFailedException'
+))
+
+# AWS clients are created once per container and reused by warm invocations
+try:
+    TRACKING_TABLE = os.environ['TRACKING_TABLE']
+    RAW_INPUTS_BUCKET = os.environ['RAW_INPUTS_BUCKET']
+except KeyError as e:
+    raise RuntimeError(f"Missing required environment variable: {e.args[0]}") from e
+
+# Bedrock Agent is used only when both IDs are set to real values
+BEDROCK_AGENT_ID = os.environ.get('BEDROCK_AGENT_ID', 'PLACEHOLDER_AGENT_ID')
+BEDROCK_AGENT_ALIAS_ID = os.environ.get('BEDROCK_AGENT_ALIAS_ID', 'TSTALIASID')
+
+_DDB_CLIENT = boto3.client('dynamodb')
+_SERIALIZER = TypeSerializer()
+_S3 = boto3.client('s3')
+# Created here rather than on first use: records in a batch are processed on
+# worker threads, and creating clients from the default session is not thread-safe
+_BEDROCK = (
+    boto3.client('bedrock-agent-runtime')
+    if BEDROCK_AGENT_ID != 'PLACEHOLDER_AGENT_ID' and BEDROCK_AGENT_ALIAS_ID != 'TSTALIASID'
+    else None
+)
+
+def to_json(obj):
+    """Serialize a response body with orjson"""
+    return orjson.dumps(obj).decode()
+
+def read_text(body):
+    """
+    Decode a UTF-8 S3 StreamingBody chunk by chunk, without first holding the whole object as bytes
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    text = ''.join(decoder.decode(chunk) for chunk in body.iter_chunks(S3_READ_CHUNK_SIZE))
+    return text + decoder.decode(b'', final=True)
 
 def lambda_handler(event, context):
     """
-    Purpose: Process the resume analysis using Bedrock Agent
+    Purpose: Process resume analyses queued by SubmitAnalysisLambda
+    - Receives up to 10 SQS messages per invocation and processes them concurrently
+    - Reports failed messages back to SQS so only those are retried
+    A single message body ({'analysis_id': ..., ...}) can also be passed directly as the event
+    """
+    if 'Records' not in event:
+        return process_analysis(event)
+    
+    records = event['Records']
+    batch_item_failures = []
+    with ThreadPoolExecutor(max_workers=len(records) or 1) as executor:
+        futures = {
+            executor.submit(process_record, record): record['messageId']
+            for record in records
+        }
+        for future, message_id in futures.items():
+            try:
+                future.result()
+            except Exception:
+                batch_item_failures.append({'itemIdentifier': message_id})
+    
+    return {'batchItemFailures': batch_item_failures}
+
+def process_record(record):
+    """
+    Process the analysis described by one SQS record
+    Transient failures propagate, so the handler reports the message in
+    batchItemFailures and SQS redelivers it (up to the queue's redrive limit)
+    """
+    return process_analysis(orjson.loads(record['body']))
+
+def is_transient_error(error):
+    """True for throttling, service-side and connection errors that a retry may fix"""
+    if isinstance(error, (BotocoreConnectionError, HTTPClientError)):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code', '')
+        status_code = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+        return code.lower() in TRANSIENT_ERROR_CODES or status_code == 429 or status_code >= 500
+    return False
+
+def process_analysis(message):
+    """
+    Process one resume analysis using Bedrock Agent
     - Retrieve resume and job description from S3
     - Call Bedrock Agent for analysis
     - Update DynamoDB with results
     """
+    analysis_id = message.get('analysis_id')
+    if not analysis_id:
+        # Malformed message: nothing to record and nothing a retry would fix
+        return {
+            'statusCode': 400,
+            'body': to_json({'error': 'analysis_id is required'})
+        }
+    
+    # No separate PROCESSING write: the start time is recorded together
+    # with the final COMPLETED/FAILED status in a single update
+    processing_timestamp = datetime.now(timezone.utc).isoformat()
+    
     try:
-        analysis_id = event['analysis_id']
-        
-        # Get S3 and DynamoDB clients
-        s3_client = boto3.client('s3')
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(os.environ['TRACKING_TABLE'])
-        bucket_name = os.environ['RAW_INPUTS_BUCKET']
-        
-        # Update status to PROCESSING
-        table.update_item(
-            Key={'analysis_id': analysis_id},
-            UpdateExpression='SET #status = :status, processing_timestamp = :timestamp',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={
-                ':status': 'PROCESSING',
-                ':timestamp': datetime.now().isoformat()
-            }
-        )
-        
         # Retrieve resume and job description from S3
         try:
-            resume_response = s3_client.get_object(
-                Bucket=bucket_name,
-                Key=f"raw-inputs/{analysis_id}/resume.txt"
-            )
-            resume_text = resume_response['Body'].read().decode('utf-8')
-            
-            jd_response = s3_client.get_object(
-                Bucket=bucket_name,
-                Key=f"raw-inputs/{analysis_id}/job_description.txt"
-            )
-            job_description = jd_response['Body'].read().decode('utf-8')
+            if 'input_key' in message:
+                # Inline submissions store both inputs in one JSON object
+                input_response = _S3.get_object(
+                    Bucket=RAW_INPUTS_BUCKET,
+                    Key=message['input_key']
+                )
+                inputs = orjson.loads(input_response['Body'].read())
+                resume_text = inputs['resume']
+                job_description = inputs['jd']
+            else:
+                # Presigned uploads (and older submissions) use one object per input
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    resume_future = executor.submit(
+                        _S3.get_object,
+                        Bucket=RAW_INPUTS_BUCKET,
+                        Key=message.get('resume_key', f"raw-inputs/{analysis_id}/resume.txt")
+                    )
+                    jd_future = executor.submit(
+                        _S3.get_object,
+                        Bucket=RAW_INPUTS_BUCKET,
+                        Key=message.get('jd_key', f"raw-inputs/{analysis_id}/job_description.txt")
+                    )
+                    resume_text = read_text(resume_future.result()['Body'])
+                    job_description = read_text(jd_future.result()['Body'])
             
         except Exception as e:
-            # Update status to FAILED
-            table.update_item(
-                Key={'analysis_id': analysis_id},
-                UpdateExpression='SET #status = :status, error_message = :error, completion_timestamp = :timestamp',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={
-                    ':status': 'FAILED',
-                    ':error': f"Failed to retrieve input files: {str(e)}",
-                    ':timestamp': datetime.now().isoformat()
-                }
-            )
-            return {
-                'statusCode': 500,
-                'body': json.dumps({'error': f'Failed to retrieve input files: {str(e)}'})
-            }
+            if is_transient_error(e):
+                raise
+            return record_failure(analysis_id, processing_timestamp, f"Failed to retrieve input files: {str(e)}")
         
         # Process with Bedrock Agent (if agent IDs are not placeholders)
-        bedrock_agent_id = os.environ.get('BEDROCK_AGENT_ID', 'PLACEHOLDER_AGENT_ID')
-        bedrock_agent_alias_id = os.environ.get('BEDROCK_AGENT_ALIAS_ID', 'TSTALIASID')
-        
-        if bedrock_agent_id != 'PLACEHOLDER_AGENT_ID' and bedrock_agent_alias_id != 'TSTALIASID':
+        if _BEDROCK is not None:
             try:
                 analysis_result = invoke_bedrock_agent(
                     resume_text, 
                     job_description, 
-                    bedrock_agent_id, 
-                    bedrock_agent_alias_id
+                    analysis_id
                 )
             except Exception as e:
-                # Update status to FAILED
-                table.update_item(
-                    Key={'analysis_id': analysis_id},
-                    UpdateExpression='SET #status = :status, error_message = :error, completion_timestamp = :timestamp',
-                    ExpressionAttributeNames={'#status': 'status'},
-                    ExpressionAttributeValues={
-                        ':status': 'FAILED',
-                        ':error': f"Bedrock Agent error: {str(e)}",
-                        ':timestamp': datetime.now().isoformat()
-                    }
-                )
-                return {
-                    'statusCode': 500,
-                    'body': json.dumps({'error': f'Bedrock Agent error: {str(e)}'})
-                }
+                if is_transient_error(e):
+                    raise
+                return record_failure(analysis_id, processing_timestamp, f"Bedrock Agent error: {str(e)}")
         else:
             # Mock analysis for testing when Bedrock Agent is not configured
             analysis_result = generate_mock_analysis(resume_text, job_description)
         
-        # Update DynamoDB with results
-        table.update_item(
-            Key={'analysis_id': analysis_id},
-            UpdateExpression='SET #status = :status, analysis_result = :result, completion_timestamp = :timestamp',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={
-                ':status': 'COMPLETED',
-                ':result': analysis_result,
-                ':timestamp': datetime.now().isoformat()
-            }
-        )
+        # Update DynamoDB with results (completion time is when the analysis finished)
+        if not update_final_status(
+            analysis_id, 'COMPLETED', processing_timestamp, analysis_result['timestamp'],
+            analysis_result=_SERIALIZER.serialize(analysis_result)
+        ):
+            return already_processed_response(analysis_id)
         
         return {
             'statusCode': 200,
-            'body': json.dumps({
+            'body': to_json({
                 'status': 'completed',
                 'analysis_id': analysis_id,
                 'result': analysis_result
@@ -115,32 +202,101 @@ def lambda_handler(event, context):
         }
         
     except Exception as e:
-        # Update status to FAILED if possible
-        try:
-            table.update_item(
-                Key={'analysis_id': analysis_id},
-                UpdateExpression='SET #status = :status, error_message = :error, completion_timestamp = :timestamp',
-                ExpressionAttributeNames={'#status': 'status'},
-                ExpressionAttributeValues={
-                    ':status': 'FAILED',
-                    ':error': str(e),
-                    ':timestamp': datetime.now().isoformat()
-                }
-            )
-        except:
-            pass  # If we can't update the table, at least return the error
-            
-        return {
-            'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
-        }
+        # Transient errors (including a failed status write) are left to SQS to
+        # retry; anything else is permanent and recorded as FAILED
+        if is_transient_error(e):
+            raise
+        return record_failure(analysis_id, processing_timestamp, str(e))
 
-def invoke_bedrock_agent(resume_text, job_description, agent_id, agent_alias_id):
+def record_failure(analysis_id, processing_timestamp, error_message):
     """
-    Invoke Bedrock Agent for resume analysis
+    Mark the analysis FAILED for a permanent error and build the error response
+    If the status write itself fails, the exception propagates so the message is retried
+    """
+    if not update_final_status(
+        analysis_id, 'FAILED', processing_timestamp, datetime.now(timezone.utc).isoformat(),
+        error_message={'S': error_message}
+    ):
+        return already_processed_response(analysis_id)
+    return {
+        'statusCode': 500,
+        'body': to_json({'error': error_message})
+    }
+
+def update_final_status(analysis_id, status, processing_timestamp, completion_timestamp, **attributes):
+    """
+    Record the final COMPLETED/FAILED status in a single conditional write
+    The write only applies while the record is still pending, so a retried or
+    duplicate delivery cannot overwrite an analysis that was already finished.
+    Extra attributes are passed as DynamoDB attribute values (e.g. error_message={'S': ...}).
+    Returns False if the analysis had already been processed.
     """
-    bedrock_agent_client = boto3.client('bedrock-agent-runtime')
+    update_expression = 'SET #status = :status, processing_timestamp = :started, completion_timestamp = :timestamp'
+    expression_values = {
+        ':status': {'S': status},
+        ':started': {'S': processing_timestamp},
+        ':timestamp': {'S': completion_timestamp},
+        ':submitted': {'S': 'SUBMITTED'},
+        ':processing': {'S': 'PROCESSING'}
+    }
+    for name, value in attributes.items():
+        update_expression += f', {name} = :{name}'
+        expression_values[f':{name}'] = value
+    # The progress snapshot is superseded by the final result
+    update_expression += ' REMOVE partial_analysis'
     
+    try:
+        _DDB_CLIENT.update_item(
+            TableName=TRACKING_TABLE,
+            Key={'analysis_id': {'S': analysis_id}},
+            UpdateExpression=update_expression,
+            # PROCESSING is still accepted for records started before that status was dropped
+            ConditionExpression='attribute_exists(analysis_id) AND #status IN (:submitted, :processing)',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues=expression_values
+        )
+    except _DDB_CLIENT.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+def save_partial_analysis(analysis_id, partial_text):
+    """
+    Best-effort progress write of the agent's answer so far
+    Only applies while the analysis is still pending. A failed progress write
+    is ignored: the final status write decides the outcome of the analysis.
+    """
+    try:
+        _DDB_CLIENT.update_item(
+            TableName=TRACKING_TABLE,
+            Key={'analysis_id': {'S': analysis_id}},
+            UpdateExpression='SET partial_analysis = :partial',
+            ConditionExpression='#status IN (:submitted, :processing)',
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues={
+                ':partial': {'S': partial_text},
+                ':submitted': {'S': 'SUBMITTED'},
+                ':processing': {'S': 'PROCESSING'}
+            }
+        )
+    except (ClientError, BotocoreConnectionError, HTTPClientError):
+        pass
+
+def already_processed_response(analysis_id):
+    """Response for a message whose analysis was already completed or failed"""
+    return {
+        'statusCode': 200,
+        'body': to_json({
+            'status': 'skipped',
+            'analysis_id': analysis_id,
+            'message': 'Analysis was already processed'
+        })
+    }
+
+def invoke_bedrock_agent(resume_text, job_description, analysis_id):
+    """
+    Invoke Bedrock Agent for resume analysis
+    Each analysis gets its own agent session, so concurrent analyses never share a conversation
+    """
     prompt = f"""
     Please analyze the following resume against the job description and provide detailed feedback:
     
@@ -158,36 +314,51 @@ def invoke_bedrock_agent(resume_text, job_description, agent_id, agent_alias_id)
     5. Specific recommendations for improvement
     """
     
-    response = bedrock_agent_client.invoke_agent(
-        agentId=agent_id,
-        agentAliasId=agent_alias_id,
-        sessionId=f"session-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+    response = _BEDROCK.invoke_agent(
+        agentId=BEDROCK_AGENT_ID,
+        agentAliasId=BEDROCK_AGENT_ALIAS_ID,
+        sessionId=get_session_id(analysis_id),
         inputText=prompt
     )
     
-    # Process the response
-    result = ""
+    # Process the response: collect the raw bytes and decode once at the end
+    # (a multi-byte character may also be split across chunks). The text so far
+    # is saved periodically so clients can show partial results.
+    buffer = bytearray()
+    last_partial_write = time.monotonic()
     for event in response['completion']:
         if 'chunk' in event:
             chunk = event['chunk']
             if 'bytes' in chunk:
-                result += chunk['bytes'].decode('utf-8')
+                buffer.extend(chunk['bytes'])
+                now = time.monotonic()
+                if now - last_partial_write >= PARTIAL_WRITE_INTERVAL_SECONDS:
+                    save_partial_analysis(analysis_id, buffer.decode('utf-8', errors='ignore'))
+                    last_partial_write = now
+    result = buffer.decode('utf-8')
     
     return {
         'match_score': extract_match_score(result),
         'analysis': result,
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now(timezone.utc).isoformat()
     }
 
+def get_session_id(analysis_id):
+    """
+    Bedrock Agent session ID for an analysis: the analysis_id itself when it is a
+    valid session ID (submit only accepts UUIDs), otherwise a hash of it
+    """
+    if _SESSION_ID_RE.fullmatch(analysis_id):
+        return analysis_id
+    return hashlib.sha256(analysis_id.encode('utf-8')).hexdigest()
+
 def generate_mock_analysis(resume_text, job_description):
     """
     Generate a mock analysis for testing purposes when Bedrock Agent is not configured
     """
-    # Simple keyword matching for mock score
-    resume_words = set(resume_text.lower().split())
-    jd_words = set(job_description.lower().split())
-    common_words = resume_words.intersection(jd_words)
-    mock_score = min(100, len(common_words) * 5)  # Simple scoring
+    # Simple keyword matching for mock score: multiset intersection of the word bags
+    common_words = word_bag(resume_text) & word_bag(job_description)
+    mock_score = min(100, sum(common_words.values()) * 5)  # Simple scoring
     
     return {
         'match_score': mock_score,
@@ -206,28 +377,24 @@ def generate_mock_analysis(resume_text, job_description):
         
         Recommendations:
         - This is a mock analysis. Configure AWS Bedrock Agent for real AI-powered resume coaching.
-        - Common keywords found: {', '.join(list(common_words)[:10])}
+        - Common keywords found: {', '.join(word for word, _ in common_words.most_common(10))}
         """,
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
         'is_mock': True
     }
 
+def word_bag(text):
+    """
+    Count word occurrences, lower-casing token by token instead of copying the whole text
+    """
+    return Counter(match.group().lower() for match in _WORD_RE.finditer(text))
+
 def extract_match_score(analysis_text):
     """
     Extract match score from analysis text
     """
-    import re
-    
-    # Look for patterns like "Match score: 85" or "Score: 85/100"
-    patterns = [
-        r'match score[:\s]+(\d+)',
-        r'score[:\s]+(\d+)',
-        r'(\d+)/100',
-        r'(\d+)%'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, analysis_text.lower())
+    for pattern in _SCORE_PATTERNS:
+        match = pattern.search(analysis_text)
         if match:
             return int(match.group(1))
     
@@ -1,90 +1,257 @@
-import json
+import orjson
 import boto3
-import uuid
 import os
-from datetime import datetime, timedelta
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+# S3 object names under raw-inputs/{analysis_id}/: inputs submitted inline are
+# stored together as one JSON object, presigned uploads as one object each
+COMBINED_INPUT_OBJECT = 'input.json'
+INPUT_DOCUMENTS = {
+    'resume': 'resume.txt',
+    'job_description': 'job_description.txt'
+}
+UPLOAD_URL_EXPIRY_SECONDS = 900
+# Largest accepted input document, enforced on presigned uploads by the POST
+# policy and on inline submissions before anything is stored
+MAX_INPUT_BYTES = 1024 * 1024
+
+# Analysis IDs are client-generated UUIDs (with or without dashes); anything
+# else is rejected before it is used in S3 keys or DynamoDB
+_ANALYSIS_ID_RE = re.compile(
+    r'[0-9a-f]{32}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}',
+    re.IGNORECASE
+)
+
+# BatchWriteItem accepts at most 25 items per call; unprocessed items are
+# retried with exponential backoff
+BATCH_WRITE_LIMIT = 25
+BATCH_MAX_RETRIES = 5
+BATCH_BACKOFF_BASE_SECONDS = 0.05
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS'
+}
+
+# AWS clients are created once per container and reused by warm invocations
+try:
+    TRACKING_TABLE = os.environ['TRACKING_TABLE']
+    RAW_INPUTS_BUCKET = os.environ['RAW_INPUTS_BUCKET']
+    PROCESS_QUEUE_URL = os.environ['PROCESS_QUEUE_URL']
+except KeyError as e:
+    raise RuntimeError(f"Missing required environment variable: {e.args[0]}") from e
+
+_DDB_CLIENT = boto3.client('dynamodb')
+_S3 = boto3.client('s3')
+_SQS = boto3.client('sqs')
+
+def to_json(obj):
+    """Serialize a response body with orjson"""
+    return orjson.dumps(obj).decode()
 
 def lambda_handler(event, context):
     """
     Purpose: Initial ingestion and processing kickoff
     - Validate input data
-    - Store resume/JD in S3
+    - Store resume/JD in S3 (or accept keys of inputs uploaded via presigned URLs)
     - Create DynamoDB tracking record
-    - Trigger ProcessAnalysisLambda asynchronously
+    - Queue the analysis for ProcessAnalysisLambda via SQS
+    Routes:
+    - POST /analyze - Submit an analysis
+    - GET /upload-url - Presigned S3 PUT URL for uploading an input document
     """
+    if event.get('httpMethod') == 'GET' and event.get('path') == '/upload-url':
+        return handle_upload_url(event)
+
     try:
-        body = json.loads(event['body'])
+        submitted_at = datetime.now(timezone.utc)
+        body = orjson.loads(event['body'])
         analysis_id = body['analysis_id']
-        resume_text = body['resume_text']
-        job_description = body['job_description']
-
-        # Input validation
-        if not resume_text or not job_description:
+        if not is_valid_analysis_id(analysis_id):
             return {
                 'statusCode': 400,
-                'body': json.dumps({'error': 'Resume and job description are required'})
+                'body': to_json({'error': 'analysis_id must be a UUID'})
             }
 
-        # Store in S3
-        s3_client = boto3.client('s3')
-        bucket_name = os.environ['RAW_INPUTS_BUCKET']
+        # Analysis IDs are never reused: results of a completed analysis are
+        # cached by ID (GET /results), so a resubmission must not replace the record
+        if analysis_exists(analysis_id):
+            return already_submitted_response(analysis_id)
 
-        # Store resume
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=f"raw-inputs/{analysis_id}/resume.txt",
-            Body=resume_text.encode('utf-8'),
-            ContentType='text/plain'
-        )
+        if 'resume_key' in body or 'jd_key' in body:
+            # Inputs were already uploaded straight to S3 via GET /upload-url
+            resume_key = get_input_key(analysis_id, 'resume')
+            jd_key = get_input_key(analysis_id, 'job_description')
+            if body.get('resume_key') != resume_key or body.get('jd_key') != jd_key:
+                return {
+                    'statusCode': 400,
+                    'body': to_json({'error': 'resume_key and jd_key must be the keys issued by /upload-url for this analysis_id'})
+                }
+            input_location = {'resume_key': resume_key, 'jd_key': jd_key}
+            s3_paths = {'resume_s3_path': {'S': resume_key}, 'jd_s3_path': {'S': jd_key}}
+        else:
+            resume_text = body['resume_text']
+            job_description = body['job_description']
 
-        # Store job description
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=f"raw-inputs/{analysis_id}/job_description.txt",
-            Body=job_description.encode('utf-8'),
-            ContentType='text/plain'
-        )
+            # Input validation
+            if not resume_text or not job_description:
+                return {
+                    'statusCode': 400,
+                    'body': to_json({'error': 'Resume and job description are required'})
+                }
+            if max(len(resume_text.encode('utf-8')), len(job_description.encode('utf-8'))) > MAX_INPUT_BYTES:
+                return {
+                    'statusCode': 413,
+                    'body': to_json({'error': f'Resume and job description must each be at most {MAX_INPUT_BYTES} bytes'})
+                }
 
-        # Track in DynamoDB
-        dynamodb = boto3.resource('dynamodb')
-        table = dynamodb.Table(os.environ['TRACKING_TABLE'])
-        table.put_item(
-            Item={
-                'analysis_id': analysis_id,
-                'status': 'SUBMITTED',
-                'timestamp': datetime.now().isoformat(),
-                'resume_s3_path': f"raw-inputs/{analysis_id}/resume.txt",
-                'jd_s3_path': f"raw-inputs/{analysis_id}/job_description.txt"
-            }
-        )
+            # Store both inputs in S3 as a single object (one PUT instead of two)
+            input_key = f"raw-inputs/{analysis_id}/{COMBINED_INPUT_OBJECT}"
+            _S3.put_object(
+                Bucket=RAW_INPUTS_BUCKET,
+                Key=input_key,
+                Body=orjson.dumps({'resume': resume_text, 'jd': job_description}),
+                ContentType='application/json'
+            )
+            input_location = {'input_key': input_key}
+            s3_paths = {'input_s3_path': {'S': input_key}}
 
-        # Trigger processing asynchronously
-        lambda_client = boto3.client('lambda')
-        lambda_client.invoke(
-            FunctionName=os.environ['PROCESS_FUNCTION'],
-            InvocationType='Event',
-            Payload=json.dumps({'analysis_id': analysis_id})
+        # Track in DynamoDB; the condition also covers a concurrent submit of the same ID
+        try:
+            _DDB_CLIENT.put_item(
+                TableName=TRACKING_TABLE,
+                Item={
+                    'analysis_id': {'S': analysis_id},
+                    # Partition key of the RecentIndex GSI used to list analyses newest first
+                    'entity_type': {'S': 'analysis'},
+                    'status': {'S': 'SUBMITTED'},
+                    'timestamp': {'S': submitted_at.isoformat()},
+                    **s3_paths
+                },
+                ConditionExpression='attribute_not_exists(analysis_id)'
+            )
+        except _DDB_CLIENT.exceptions.ConditionalCheckFailedException:
+            return already_submitted_response(analysis_id)
+
+        # Queue for processing; the queue triggers ProcessAnalysisLambda in batches
+        _SQS.send_message(
+            QueueUrl=PROCESS_QUEUE_URL,
+            MessageBody=to_json({'analysis_id': analysis_id, **input_location})
         )
 
         return {
             'statusCode': 202,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS'
-            },
-            'body': json.dumps({
+            'headers': CORS_HEADERS,
+            'body': to_json({
                 'status': 'submitted',
                 'analysis_id': analysis_id,
-                'estimated_completion': get_estimated_completion()
+                'estimated_completion': get_estimated_completion(submitted_at)
             })
         }
     except Exception as e:
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': str(e)})
+            'body': to_json({'error': str(e)})
+        }
+
+def get_estimated_completion(submitted_at):
+    """Estimate completion time (30 seconds after submission)"""
+    return (submitted_at + timedelta(seconds=30)).isoformat()
+
+def is_valid_analysis_id(analysis_id):
+    """True if analysis_id is a UUID string"""
+    return isinstance(analysis_id, str) and _ANALYSIS_ID_RE.fullmatch(analysis_id) is not None
+
+def analysis_exists(analysis_id):
+    """True if a tracking record already exists for analysis_id"""
+    response = _DDB_CLIENT.get_item(
+        TableName=TRACKING_TABLE,
+        Key={'analysis_id': {'S': analysis_id}},
+        ProjectionExpression='analysis_id'
+    )
+    return 'Item' in response
+
+def already_submitted_response(analysis_id):
+    """409 response for an analysis_id that has already been submitted"""
+    return {
+        'statusCode': 409,
+        'headers': CORS_HEADERS,
+        'body': to_json({'error': f'Analysis {analysis_id} has already been submitted'})
+    }
+
+def get_input_key(analysis_id, document):
+    """S3 key of an input document for an analysis"""
+    return f"raw-inputs/{analysis_id}/{INPUT_DOCUMENTS[document]}"
+
+def _batch_save_many(items):
+    """
+    Write several tracking records with BatchWriteItem
+    Items use the low-level attribute format accepted by put_item
+    """
+    for start in range(0, len(items), BATCH_WRITE_LIMIT):
+        request_items = {
+            TRACKING_TABLE: [{'PutRequest': {'Item': item}} for item in items[start:start + BATCH_WRITE_LIMIT]]
         }
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = _DDB_CLIENT.batch_write_item(RequestItems=request_items)
+            request_items = response.get('UnprocessedItems')
+            if not request_items:
+                break
+            if attempt == BATCH_MAX_RETRIES:
+                raise RuntimeError('BatchWriteItem left unprocessed items after retries')
+            time.sleep(BATCH_BACKOFF_BASE_SECONDS * (2 ** attempt))
+
+def handle_upload_url(event):
+    """
+    Handle GET /upload-url?analysis_id=...&document=resume|job_description
+    Returns a presigned S3 POST (URL and form fields) so large inputs bypass API Gateway.
+    The POST policy caps the upload at MAX_INPUT_BYTES, and no URL is issued once
+    the analysis has been submitted, so its inputs cannot be replaced afterwards.
+    """
+    try:
+        query_parameters = event.get('queryStringParameters') or {}
+        analysis_id = query_parameters.get('analysis_id')
+        document = query_parameters.get('document')
+
+        if not is_valid_analysis_id(analysis_id) or document not in INPUT_DOCUMENTS:
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': to_json({'error': f"analysis_id (UUID) and document ({', '.join(INPUT_DOCUMENTS)}) are required"})
+            }
 
-def get_estimated_completion():
-    """Estimate completion time (30 seconds from now)"""
-    return (datetime.now() + timedelta(seconds=30)).isoformat()
+        if analysis_exists(analysis_id):
+            return already_submitted_response(analysis_id)
+
+        key = get_input_key(analysis_id, document)
+        upload = _S3.generate_presigned_post(
+            Bucket=RAW_INPUTS_BUCKET,
+            Key=key,
+            Fields={'Content-Type': 'text/plain'},
+            Conditions=[
+                {'Content-Type': 'text/plain'},
+                ['content-length-range', 1, MAX_INPUT_BYTES]
+            ],
+            ExpiresIn=UPLOAD_URL_EXPIRY_SECONDS
+        )
+
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': to_json({
+                'url': upload['url'],
+                'fields': upload['fields'],
+                'key': key,
+                'max_bytes': MAX_INPUT_BYTES,
+                'expires_in': UPLOAD_URL_EXPIRY_SECONDS
+            })
+        }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': to_json({'error': str(e)})
+        }
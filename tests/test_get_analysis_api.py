@@ -1,138 +1,181 @@
-import requests
-import json
+import logging
+import asyncio
+import pytest
+import orjson
 import uuid
 import time
 
+# Skip this module (not the whole suite) when the async HTTP test dependencies are missing
+httpx = pytest.importorskip("httpx")
+pytest_asyncio = pytest.importorskip("pytest_asyncio")
+
+log = logging.getLogger('nextfit.tests')
+
 # Replace with your deployed API Gateway URL
 API_GATEWAY_URL = "https://febwc3ocqb.execute-api.us-east-1.amazonaws.com/prod"
 
-def test_health_endpoint():
+# How long the client keeps idle connections open for reuse
+KEEPALIVE_EXPIRY_SECONDS = 60
+
+# Throttling and gateway errors are retried with exponential backoff instead of
+# failing a test on the first blip. After the last retry the final response is
+# returned so the test can report it.
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+RETRY_TOTAL = 5
+RETRY_BACKOFF_FACTOR = 0.3
+
+class RetryingTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that retries RETRY_STATUS_CODES responses, honouring Retry-After"""
+
+    def __init__(self, transport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        for attempt in range(RETRY_TOTAL + 1):
+            response = await self._transport.handle_async_request(request)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == RETRY_TOTAL:
+                return response
+            try:
+                delay = float(response.headers["Retry-After"])
+            except (KeyError, ValueError):
+                delay = RETRY_BACKOFF_FACTOR * (2 ** attempt)
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client():
+    """
+    One async HTTP/2 client shared by every test in the session. Under pytest-xdist
+    each worker has its own client, reusing one keep-alive connection to API Gateway
+    for its tests; tests pass paths relative to API_GATEWAY_URL.
+    Failed connection attempts and RETRY_STATUS_CODES responses are retried.
+    """
+    limits = httpx.Limits(
+        max_keepalive_connections=4,
+        max_connections=8,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS
+    )
+    transport = httpx.AsyncHTTPTransport(http2=True, retries=3, limits=limits)
+    async with httpx.AsyncClient(base_url=API_GATEWAY_URL, timeout=10, transport=RetryingTransport(transport)) as client:
+        yield client
+
+# Sample inputs submitted by the real-analysis test
+RESUME_TEXT = "Jane Smith, Senior Software Engineer with 7 years of experience in Python, AWS, and microservices. Led teams of 5+ developers and improved system performance by 40%."
+JOB_DESCRIPTION = "Seeking a Senior Software Engineer with strong Python and AWS experience. Leadership experience and performance optimization skills preferred."
+
+# Polling for a submitted analysis: exponential backoff from 300ms, capped at 3s
+POLL_TIMEOUT_SECONDS = 30
+POLL_INITIAL_DELAY = 0.3
+POLL_BACKOFF_FACTOR = 1.25
+POLL_MAX_DELAY = 3.0
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Routes that reach the Lambda get 400/404 from it; routes that API Gateway
+# rejects itself (no matching resource or method) get 403 "Missing Authentication Token"
+INVALID_ROUTE_STATUS_CODES = frozenset({400, 403, 404})
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_health_endpoint(client):
     """Test the GET /health endpoint"""
-    print(f"Testing GET {API_GATEWAY_URL}/health")
+    log.info("Testing GET /health")
     
-    try:
-        response = requests.get(f"{API_GATEWAY_URL}/health")
-        print("Response Status Code:", response.status_code)
-        print("Response Body:", json.dumps(response.json(), indent=2))
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('status') == 'healthy':
-                print("✅ Health check passed - System is healthy")
-                return True
-            else:
-                print("⚠️ Health check shows system issues")
-                return False
-        else:
-            print("❌ Health check failed with non-200 status")
-            return False
-            
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Health check failed with error: {e}")
-        return False
-
-def test_get_results_endpoint_not_found():
+    response = await client.get("/health")
+    data = orjson.loads(response.content)
+    log.info("Response Status Code: %s", response.status_code)
+    log.info("Response Body: %s", orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
+    
+    assert response.status_code == 200, "Health check failed with non-200 status"
+    assert data.get('status') == 'healthy', "Health check shows system issues"
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_results_endpoint_not_found(client):
     """Test GET /results/{analysis_id} with non-existent ID"""
-    fake_analysis_id = str(uuid.uuid4())
-    print(f"\nTesting GET {API_GATEWAY_URL}/results/{fake_analysis_id} (should return 404)")
+    fake_analysis_id = uuid.uuid4().hex
+    log.info("Testing GET /results/%s (should return 404)", fake_analysis_id)
     
-    try:
-        response = requests.get(f"{API_GATEWAY_URL}/results/{fake_analysis_id}")
-        print("Response Status Code:", response.status_code)
-        print("Response Body:", json.dumps(response.json(), indent=2))
-        
-        if response.status_code == 404:
-            print("✅ Correctly returned 404 for non-existent analysis")
-            return True
-        else:
-            print("❌ Expected 404 but got different status")
-            return False
-            
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Request failed with error: {e}")
-        return False
-
-def test_get_results_endpoint_with_real_analysis():
+    response = await client.get(f"/results/{fake_analysis_id}")
+    log.info("Response Status Code: %s", response.status_code)
+    log.info("Response Body: %s", orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode())
+    
+    assert response.status_code == 404, f"Expected 404 for non-existent analysis, got {response.status_code}"
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_results_endpoint_with_real_analysis(client):
     """Test GET /results/{analysis_id} with a real analysis ID"""
-    print(f"\nTesting GET /results endpoint with real analysis...")
+    log.info("Testing GET /results endpoint with real analysis...")
     
     # First, submit a new analysis to get a real ID
-    analysis_id = str(uuid.uuid4())
-    resume_text = "Jane Smith, Senior Software Engineer with 7 years of experience in Python, AWS, and microservices. Led teams of 5+ developers and improved system performance by 40%."
-    job_description = "Seeking a Senior Software Engineer with strong Python and AWS experience. Leadership experience and performance optimization skills preferred."
+    analysis_id = uuid.uuid4().hex
 
     submit_payload = {
         "analysis_id": analysis_id,
-        "resume_text": resume_text,
-        "job_description": job_description
+        "resume_text": RESUME_TEXT,
+        "job_description": JOB_DESCRIPTION
     }
 
-    headers = {
-        "Content-Type": "application/json"
-    }
+    # Submit analysis
+    log.info("Submitting analysis with ID: %s", analysis_id)
+    submit_response = await client.post("/analyze", content=orjson.dumps(submit_payload), headers=_JSON_HEADERS)
+    assert submit_response.status_code == 202, f"Failed to submit analysis: {submit_response.status_code}"
+    
+    # Poll until the analysis finishes, backing off from 300ms up to 3s
+    log.info("Polling GET /results/%s for up to %ss...", analysis_id, POLL_TIMEOUT_SECONDS)
+    deadline = time.monotonic() + POLL_TIMEOUT_SECONDS
+    delay = POLL_INITIAL_DELAY
+    data = {}
+    while True:
+        response = await client.get(f"/results/{analysis_id}")
+        # GetItem is eventually consistent, so a 404 right after submit only
+        # means the new record is not visible yet; keep polling until the deadline
+        if response.status_code != 404:
+            data = orjson.loads(response.content)
+            if response.status_code != 200 or data.get('status') in ('completed', 'failed'):
+                break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * POLL_BACKOFF_FACTOR, POLL_MAX_DELAY)
+    
+    log.info("Response Status Code: %s", response.status_code)
+    log.info("Response Body: %s", orjson.dumps(data, option=orjson.OPT_INDENT_2).decode())
+    
+    assert response.status_code == 200, f"Unexpected status code: {response.status_code}"
+    
+    status = data.get('status')
+    if status in ('processing', 'submitted'):
+        log.warning("⚠️ Analysis still processing after %ss", POLL_TIMEOUT_SECONDS)
+        return
+    
+    assert status != 'failed', "Analysis failed - check logs for details"
+    assert status == 'completed', f"Unknown status: {status}"
+    
+    results = data.get('results', {})
+    required_fields = ['match_score', 'missing_skills', 'recommendations', 'confidence_score', 'analysis_timestamp']
+    missing_fields = [field for field in required_fields if field not in results]
+    assert not missing_fields, f"Missing required fields in results: {missing_fields}"
+    
+    log.info("   Match Score: %s", results['match_score'])
+    log.info("   Missing Skills: %s", results['missing_skills'])
+    log.info("   Confidence Score: %s", results['confidence_score'])
 
+async def probe_route(client, route):
+    """GET one route and return its status code (None if the request failed)"""
     try:
-        # Submit analysis
-        print(f"Submitting analysis with ID: {analysis_id}")
-        submit_response = requests.post(f"{API_GATEWAY_URL}/analyze", headers=headers, data=json.dumps(submit_payload))
-        
-        if submit_response.status_code != 202:
-            print(f"❌ Failed to submit analysis: {submit_response.status_code}")
-            return False
-        
-        print("✅ Analysis submitted successfully")
-        
-        # Wait a moment for processing
-        print("Waiting 5 seconds for processing...")
-        time.sleep(5)
-        
-        # Now test the GET endpoint
-        print(f"Testing GET {API_GATEWAY_URL}/results/{analysis_id}")
-        response = requests.get(f"{API_GATEWAY_URL}/results/{analysis_id}")
-        print("Response Status Code:", response.status_code)
-        print("Response Body:", json.dumps(response.json(), indent=2))
-        
-        if response.status_code == 200:
-            data = response.json()
-            status = data.get('status')
-            
-            if status == 'completed':
-                results = data.get('results', {})
-                required_fields = ['match_score', 'missing_skills', 'recommendations', 'confidence_score', 'analysis_timestamp']
-                
-                missing_fields = [field for field in required_fields if field not in results]
-                if missing_fields:
-                    print(f"❌ Missing required fields in results: {missing_fields}")
-                    return False
-                
-                print("✅ Analysis completed with all required fields")
-                print(f"   Match Score: {results['match_score']}")
-                print(f"   Missing Skills: {results['missing_skills']}")
-                print(f"   Confidence Score: {results['confidence_score']}")
-                return True
-                
-            elif status in ['processing', 'submitted']:
-                print("✅ Analysis is still processing (this is expected)")
-                return True
-                
-            elif status == 'failed':
-                print("⚠️ Analysis failed - check logs for details")
-                return False
-                
-            else:
-                print(f"❌ Unknown status: {status}")
-                return False
-        else:
-            print(f"❌ Unexpected status code: {response.status_code}")
-            return False
-            
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Request failed with error: {e}")
-        return False
-
-def test_invalid_routes():
+        response = await client.get(route)
+        return response.status_code
+    except httpx.HTTPError as e:
+        log.error("  ❌ Request to %s failed: %s", route, e)
+        return None
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_invalid_routes(client):
     """Test invalid routes to ensure proper error handling"""
-    print(f"\nTesting invalid routes...")
+    log.info("Testing invalid routes...")
     
     invalid_routes = [
         "/results",  # Missing analysis_id
@@ -140,63 +183,15 @@ def test_invalid_routes():
         "/invalid-route",  # Non-existent route
     ]
     
-    for route in invalid_routes:
-        try:
-            print(f"Testing {API_GATEWAY_URL}{route}")
-            response = requests.get(f"{API_GATEWAY_URL}{route}")
-            print(f"  Status: {response.status_code}")
-            
-            if response.status_code in [400, 404]:
-                print(f"  ✅ Correctly handled invalid route")
-            else:
-                print(f"  ⚠️ Unexpected status for invalid route")
-                
-        except requests.exceptions.RequestException as e:
-            print(f"  ❌ Request failed: {e}")
-
-def run_all_tests():
-    """Run all API tests"""
-    print("=" * 60)
-    print("NextFitAI GET Analysis API Tests")
-    print("=" * 60)
-    
-    tests = [
-        ("Health Check", test_health_endpoint),
-        ("Get Results - Not Found", test_get_results_endpoint_not_found),
-        ("Get Results - Real Analysis", test_get_results_endpoint_with_real_analysis),
-        ("Invalid Routes", test_invalid_routes),
-    ]
+    # The probes are independent, so they share the client and run concurrently;
+    # results are reported afterwards in route order
+    status_codes = await asyncio.gather(*(probe_route(client, route) for route in invalid_routes))
+    
+    unhandled = []
+    for route, status_code in zip(invalid_routes, status_codes):
+        log.info("Testing %s", route)
+        log.info("  Status: %s", status_code)
+        if status_code not in INVALID_ROUTE_STATUS_CODES:
+            unhandled.append(route)
     
-    results = []
-    for test_name, test_func in tests:
-        print(f"\n{'='*20} {test_name} {'='*20}")
-        try:
-            result = test_func()
-            results.append((test_name, result))
-        except Exception as e:
-            print(f"❌ Test failed with exception: {e}")
-            results.append((test_name, False))
-    
-    # Summary
-    print(f"\n{'='*60}")
-    print("TEST SUMMARY")
-    print(f"{'='*60}")
-    
-    passed = 0
-    total = len(results)
-    
-    for test_name, result in results:
-        status = "✅ PASSED" if result else "❌ FAILED"
-        print(f"{test_name}: {status}")
-        if result:
-            passed += 1
-    
-    print(f"\nOverall: {passed}/{total} tests passed")
-    
-    if passed == total:
-        print("🎉 All tests passed!")
-    else:
-        print("⚠️ Some tests failed - check the output above for details")
-
-if __name__ == "__main__":
-    run_all_tests()
+    assert not unhandled, f"Unexpected status for invalid routes: {unhandled}"
@@ -0,0 +1,49 @@
+import importlib.util
+import os
+import pathlib
+import pytest
+
+pytest.importorskip("boto3")
+
+# The Lambda reads its configuration and creates its AWS clients at import time
+os.environ.setdefault("TRACKING_TABLE", "NextFitAI-AnalysisTracking-test")
+os.environ.setdefault("RAW_INPUTS_BUCKET", "nextfitai-raw-inputs-test")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+# Every Lambda module is named lambda_function, so load this one from its path
+_SPEC = importlib.util.spec_from_file_location(
+    "process_analysis_lambda",
+    pathlib.Path(__file__).resolve().parent.parent / "src" / "process_analysis" / "lambda_function.py"
+)
+process_analysis = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(process_analysis)
+
+@pytest.mark.parametrize("analysis_text, expected", [
+    ("Match Score: 85", 85),
+    ("Score: 85/100", 85),
+    ("Overall fit is 72/100", 72),
+    ("Roughly a 90% match", 90),
+    # An explicit score wins over earlier /100 and % figures
+    ("Strengths include 40% faster deploys. Overall Match Score: 81/100", 81),
+    ("Improve by 20% by adding metrics. Score: 64", 64),
+    ("Covers 30% of the tools, 55/100 overall", 55),
+    ("No score in this text", 75),
+])
+def test_extract_match_score(analysis_text, expected):
+    """Score patterns are tried in priority order, not by position in the text"""
+    assert process_analysis.extract_match_score(analysis_text) == expected
+
+@pytest.mark.parametrize("analysis_id", [
+    "123e4567-e89b-12d3-a456-426614174000",
+    "123e4567e89b12d3a456426614174000",
+])
+def test_session_id_uses_valid_analysis_id(analysis_id):
+    """UUID analysis IDs are valid Bedrock session IDs and are used as-is"""
+    assert process_analysis.get_session_id(analysis_id) == analysis_id
+
+@pytest.mark.parametrize("analysis_id", ["my analysis #1", "x", "a" * 101, "résumé-42"])
+def test_session_id_hashes_invalid_analysis_id(analysis_id):
+    """Other IDs are replaced by a stable hash that Bedrock accepts"""
+    session_id = process_analysis.get_session_id(analysis_id)
+    assert session_id == process_analysis.get_session_id(analysis_id)
+    assert process_analysis._SESSION_ID_RE.fullmatch(session_id)
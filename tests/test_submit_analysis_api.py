@@ -1,39 +1,43 @@
+import logging
 import requests
-import json
+import orjson
 import uuid
 
+log = logging.getLogger('nextfit.tests')
+
 # Replace with your deployed API Gateway URL
 API_GATEWAY_URL = "https://febwc3ocqb.execute-api.us-east-1.amazonaws.com/prod"
 
+# Sample inputs and request headers for the submit test
+RESUME_TEXT = "John Doe, Software Engineer with 5 years of experience in Python and AWS. Developed scalable microservices."
+JOB_DESCRIPTION = "Seeking a Software Engineer with strong Python and AWS experience. Knowledge of microservices architecture is a plus."
+_HEADERS = {"Content-Type": "application/json"}
+
 def test_analyze_endpoint():
-    print(f"Testing POST {API_GATEWAY_URL}/analyze")
-    analysis_id = str(uuid.uuid4())
-    resume_text = "John Doe, Software Engineer with 5 years of experience in Python and AWS. Developed scalable microservices."
-    job_description = "Seeking a Software Engineer with strong Python and AWS experience. Knowledge of microservices architecture is a plus."
+    log.info("Testing POST %s/analyze", API_GATEWAY_URL)
+    analysis_id = uuid.uuid4().hex
 
     payload = {
         "analysis_id": analysis_id,
-        "resume_text": resume_text,
-        "job_description": job_description
-    }
-
-    headers = {
-        "Content-Type": "application/json"
+        "resume_text": RESUME_TEXT,
+        "job_description": JOB_DESCRIPTION
     }
 
     try:
-        response = requests.post(f"{API_GATEWAY_URL}/analyze", headers=headers, data=json.dumps(payload))
+        response = requests.post(f"{API_GATEWAY_URL}/analyze", headers=_HEADERS, data=orjson.dumps(payload))
         response.raise_for_status()  # Raise an exception for HTTP errors (4xx or 5xx)
-        print("Response Status Code:", response.status_code)
-        print("Response Body:", response.json())
-        if response.status_code == 202 and response.json().get("status") == "submitted":
-            print(f"Successfully submitted analysis with ID: {analysis_id}")
+        data = orjson.loads(response.content)
+        log.info("Response Status Code: %s", response.status_code)
+        log.info("Response Body: %s", data)
+        if response.status_code == 202 and data.get("status") == "submitted":
+            log.info("Successfully submitted analysis with ID: %s", analysis_id)
         else:
-            print("Analysis submission failed or returned unexpected status.")
+            log.error("Analysis submission failed or returned unexpected status.")
     except requests.exceptions.RequestException as e:
-        print(f"An error occurred: {e}")
+        log.error("An error occurred: %s", e)
         if hasattr(e, 'response') and e.response is not None:
-            print("Error Response Body:", e.response.text)
+            log.error("Error Response Body: %s", e.response.text)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     test_analyze_endpoint()
@@ -1,91 +1,283 @@
 import boto3
+import functools
 import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
 from datetime import datetime
 
+log = logging.getLogger('nextfit.monitor')
+
+def configure_logging():
+    """
+    Log plain messages to stdout, buffered in memory and written out in blocks
+    (flushed early on errors and at exit) instead of one write per line
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    buffered = logging.handlers.MemoryHandler(capacity=100, flushLevel=logging.ERROR, target=handler)
+    logging.basicConfig(level=logging.INFO, handlers=[buffered])
+
+# Tracking table name; override with TRACKING_TABLE for other environments
+TRACKING_TABLE = os.environ.get('TRACKING_TABLE', 'NextFitAI-AnalysisTracking-prod')
+
+# One boto3 session per process: credentials and endpoint metadata are resolved once
+_SESSION = boto3.session.Session(region_name='us-east-1')
+
+# Status lookups cache finished analyses for the life of the process and
+# pending ones for a short TTL; concurrent lookups of the same ID share one GetItem
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED')
+PENDING_CACHE_TTL_SECONDS = 2.0
+_STATUS_CACHE = {}  # analysis_id -> (expires_at or None for terminal, item)
+_IN_FLIGHT = {}  # analysis_id -> Future shared by concurrent callers
+_CACHE_LOCK = threading.Lock()
+
+@functools.lru_cache(maxsize=1)
+def _get_dynamodb():
+    """
+    DynamoDB resource shared by all helpers, created on first use
+    Reads go through DAX when DAX_ENDPOINT is set (requires the amazon-dax-client package)
+    """
+    dax_endpoint = os.environ.get('DAX_ENDPOINT')
+    if dax_endpoint:
+        import amazondax
+        return amazondax.AmazonDaxClient.resource(endpoint_url=dax_endpoint, region_name=_SESSION.region_name)
+    return _SESSION.resource('dynamodb')
+
+@functools.lru_cache(maxsize=1)
+def _get_table():
+    """Tracking table handle on the shared DynamoDB (or DAX) resource"""
+    return _get_dynamodb().Table(TRACKING_TABLE)
+
+def print_analysis(item):
+    """
+    Print the status, timeline and result of one analysis record as a single log message
+    """
+    status, submitted, started, completed, error, result = (
+        item.get(key) for key in
+        ('status', 'timestamp', 'processing_timestamp', 'completion_timestamp', 'error_message', 'analysis_result')
+    )
+    
+    lines = [
+        f"Analysis ID: {item['analysis_id']}",
+        f"Status: {status or 'Unknown'}",
+        f"Submitted: {submitted or 'Unknown'}"
+    ]
+    if started is not None:
+        lines.append(f"Processing Started: {started}")
+    if completed is not None:
+        lines.append(f"Completed: {completed}")
+    if error is not None:
+        lines.append(f"Error: {error}")
+    if result is not None:
+        lines.append("\nAnalysis Result:")
+        lines.append(f"Match Score: {result.get('match_score', 'N/A')}")
+        lines.append(f"Analysis: {result.get('analysis', 'N/A')}")
+        if result.get('is_mock'):
+            lines.append("Note: This is a mock analysis (Bedrock Agent not configured)")
+    
+    log.info('%s', '\n'.join(lines))
+
+def get_analysis_record(analysis_id):
+    """
+    Tracking record for an analysis (None if not found), through the status cache
+    Finished records are cached indefinitely, pending ones for PENDING_CACHE_TTL_SECONDS,
+    and concurrent calls for the same ID wait on a single GetItem
+    """
+    with _CACHE_LOCK:
+        cached = _STATUS_CACHE.get(analysis_id)
+        if cached is not None and (cached[0] is None or cached[0] > time.monotonic()):
+            return cached[1]
+        future = _IN_FLIGHT.get(analysis_id)
+        owner = future is None
+        if owner:
+            future = _IN_FLIGHT[analysis_id] = Future()
+    
+    if not owner:
+        return future.result()
+    
+    try:
+        item = _get_table().get_item(Key={'analysis_id': analysis_id}).get('Item')
+    except Exception as e:
+        with _CACHE_LOCK:
+            del _IN_FLIGHT[analysis_id]
+        future.set_exception(e)
+        raise
+    
+    with _CACHE_LOCK:
+        if item is not None:
+            terminal = item.get('status') in TERMINAL_STATUSES
+            _STATUS_CACHE[analysis_id] = (None if terminal else time.monotonic() + PENDING_CACHE_TTL_SECONDS, item)
+        del _IN_FLIGHT[analysis_id]
+    future.set_result(item)
+    return item
+
 def check_analysis_status(analysis_id):
     """
     Check the status of an analysis by querying DynamoDB directly
     """
     try:
-        # Initialize DynamoDB resource
-        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-        table = dynamodb.Table('NextFitAI-AnalysisTracking-prod')
-        
         # Get the analysis record
-        response = table.get_item(
-            Key={'analysis_id': analysis_id}
-        )
+        item = get_analysis_record(analysis_id)
         
-        if 'Item' in response:
-            item = response['Item']
-            print(f"Analysis ID: {analysis_id}")
-            print(f"Status: {item.get('status', 'Unknown')}")
-            print(f"Submitted: {item.get('timestamp', 'Unknown')}")
-            
-            if 'processing_timestamp' in item:
-                print(f"Processing Started: {item['processing_timestamp']}")
-            
-            if 'completion_timestamp' in item:
-                print(f"Completed: {item['completion_timestamp']}")
-            
-            if 'error_message' in item:
-                print(f"Error: {item['error_message']}")
-            
-            if 'analysis_result' in item:
-                result = item['analysis_result']
-                print(f"\nAnalysis Result:")
-                print(f"Match Score: {result.get('match_score', 'N/A')}")
-                print(f"Analysis: {result.get('analysis', 'N/A')}")
-                if result.get('is_mock'):
-                    print("Note: This is a mock analysis (Bedrock Agent not configured)")
-            
+        if item is not None:
+            print_analysis(item)
             return item
         else:
-            print(f"No analysis found with ID: {analysis_id}")
+            log.info("No analysis found with ID: %s", analysis_id)
             return None
             
     except Exception as e:
-        print(f"Error checking analysis status: {str(e)}")
+        log.error("Error checking analysis status: %s", e)
         return None
 
+def check_many(analysis_ids, max_retries=5):
+    """
+    Check the status of several analyses with BatchGetItem (up to 100 ids per call)
+    """
+    try:
+        dynamodb = _get_dynamodb()
+        table = _get_table()
+        
+        items = []
+        unique_ids = list(dict.fromkeys(analysis_ids))
+        for start in range(0, len(unique_ids), 100):
+            request_items = {
+                table.name: {'Keys': [{'analysis_id': analysis_id} for analysis_id in unique_ids[start:start + 100]]}
+            }
+            # Retry throttled keys with exponential backoff
+            for attempt in range(max_retries + 1):
+                response = dynamodb.batch_get_item(RequestItems=request_items)
+                items.extend(response['Responses'].get(table.name, []))
+                request_items = response.get('UnprocessedKeys')
+                if not request_items or attempt == max_retries:
+                    break
+                time.sleep(0.05 * (2 ** attempt))
+            if request_items:
+                log.warning("%d analyses could not be read (throttled)", len(request_items[table.name]['Keys']))
+        
+        found = {item['analysis_id'] for item in items}
+        for item in items:
+            print_analysis(item)
+            log.info("")
+        for analysis_id in unique_ids:
+            if analysis_id not in found:
+                log.info("No analysis found with ID: %s", analysis_id)
+        
+        return items
+            
+    except Exception as e:
+        log.error("Error checking analysis status: %s", e)
+        return []
+
 def list_recent_analyses(limit=5):
     """
     List recent analyses from DynamoDB
     """
     try:
-        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-        table = dynamodb.Table('NextFitAI-AnalysisTracking-prod')
+        table = _get_table()
         
-        # Scan the table (note: in production, you'd want to use a GSI with timestamp)
-        response = table.scan(
-            Limit=limit
+        # Newest first from the RecentIndex GSI (entity_type + timestamp); reads
+        # only `limit` index entries instead of scanning the table. The paginator
+        # keeps requesting pages until `limit` items arrive, so a large limit is
+        # not cut short by DynamoDB's 1 MB page size. The resource's client
+        # returns plain Python values like the Table API.
+        paginator = table.meta.client.get_paginator('query')
+        pages = paginator.paginate(
+            TableName=table.name,
+            IndexName='RecentIndex',
+            KeyConditionExpression=Key('entity_type').eq('analysis'),
+            ScanIndexForward=False,
+            ProjectionExpression="analysis_id,#s,#t",
+            ExpressionAttributeNames={"#s": "status", "#t": "timestamp"},
+            PaginationConfig={'MaxItems': limit, 'PageSize': min(limit, 100)}
         )
+        items = [item for page in pages for item in page.get('Items', [])]
         
-        if 'Items' in response and response['Items']:
-            print(f"Recent {len(response['Items'])} analyses:")
-            for item in response['Items']:
-                print(f"- {item['analysis_id']}: {item.get('status', 'Unknown')} ({item.get('timestamp', 'Unknown')})")
-            return response['Items']
+        if items:
+            log.info("Recent %d analyses:", len(items))
+            for item in items:
+                log.info("- %s: %s (%s)", item['analysis_id'], item.get('status', 'Unknown'), item.get('timestamp', 'Unknown'))
+            return items
         else:
-            print("No analyses found")
+            log.info("No analyses found")
             return []
             
     except Exception as e:
-        print(f"Error listing analyses: {str(e)}")
+        log.error("Error listing analyses: %s", e)
+        return []
+
+def _scan_segment(segment, total_segments):
+    """
+    Scan one segment of the tracking table to the end
+    Each worker builds its own session and resource, since boto3 resources are not thread-safe
+    """
+    table = boto3.session.Session(region_name=_SESSION.region_name).resource('dynamodb').Table(TRACKING_TABLE)
+    scan_kwargs = {
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'ProjectionExpression': "analysis_id,#s,#t",
+        'ExpressionAttributeNames': {"#s": "status", "#t": "timestamp"}
+    }
+    items = []
+    while True:
+        response = table.scan(**scan_kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def list_all_analyses(limit=None, segments=4):
+    """
+    List every analysis in the table, newest first, using a parallel scan
+    Unlike list_recent_analyses this also finds records written before the RecentIndex GSI existed
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            segment_items = executor.map(_scan_segment, range(segments), [segments] * segments)
+            items = [item for segment in segment_items for item in segment]
+        
+        items.sort(key=lambda item: item.get('timestamp', ''), reverse=True)
+        if limit is not None:
+            items = items[:limit]
+        
+        if items:
+            log.info("%d analyses:", len(items))
+            for item in items:
+                log.info("- %s: %s (%s)", item['analysis_id'], item.get('status', 'Unknown'), item.get('timestamp', 'Unknown'))
+        else:
+            log.info("No analyses found")
+        return items
+            
+    except Exception as e:
+        log.error("Error listing analyses: %s", e)
         return []
 
 if __name__ == "__main__":
-    import sys
-    
-    if len(sys.argv) > 1:
-        # Check specific analysis ID
-        analysis_id = sys.argv[1]
-        check_analysis_status(analysis_id)
-    else:
-        # List recent analyses
-        print("Recent analyses:")
-        analyses = list_recent_analyses()
+    configure_logging()
+    try:
+        if len(sys.argv) > 1 and sys.argv[1] == '--all':
+            # List every analysis with a parallel scan
+            list_all_analyses()
+        elif len(sys.argv) > 2:
+            # Check several analysis IDs with one batched read
+            check_many(sys.argv[1:])
+        elif len(sys.argv) > 1:
+            # Check specific analysis ID
+            analysis_id = sys.argv[1]
+            check_analysis_status(analysis_id)
+        else:
+            # List recent analyses
+            log.info("Recent analyses:")
+            analyses = list_recent_analyses()
         
-        if analyses:
-            print("\nTo check a specific analysis, run:")
-            print("python check_analysis_status.py <analysis_id>")
+            if analyses:
+                log.info("\nTo check a specific analysis, run:")
+                log.info("python check_analysis_status.py <analysis_id> [<analysis_id> ...]")
+    finally:
+        logging.shutdown()